@@ -3,19 +3,308 @@ Rapid Prototype Genesis - Complete Flask PWA
 Ready-to-run Flask application with all required files
 """
 
-from flask import Flask, render_template, request, jsonify, make_response
+from flask import Blueprint, Flask, render_template, request, jsonify, make_response, Response, stream_with_context, g, has_request_context
 from flask_cors import CORS
-from datetime import datetime
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
+from werkzeug.middleware.proxy_fix import ProxyFix
+import atexit
+import click
+import collections
+import contextlib
+import fcntl
+import functools
+import gzip
+import hashlib
+import heapq
+import html
+import io
 import json
+import logging
+import math
 import os
+import queue
+import random
+import re
+import secrets
+import sqlite3
+import string
+import sys
+import tarfile
+import threading
+import time
+import traceback
+import uuid
 from pathlib import Path
 
-app = Flask(__name__)
-CORS(app)
+_MODULE_STARTED = time.perf_counter()
 
-# Create storage directory for PRDs
+# Request size limits for /save-prd; the per-field caps keep one submission
+# from pinning a worker's memory even when it fits under the body limit
+MAX_SUBMISSION_BYTES = int(os.environ.get('RPG_MAX_SUBMISSION_BYTES', 2 * 1024 * 1024))
+MAX_MARKDOWN_CHARS = int(os.environ.get('RPG_MAX_MARKDOWN_CHARS', 1024 * 1024))
+MAX_ANSWER_CHARS = int(os.environ.get('RPG_MAX_ANSWER_CHARS', 32 * 1024))
+MAX_TIMESTAMP_CHARS = 64
+
+# Routes and CLI commands; attached to an app by create_app()
+bp = Blueprint('rpg', __name__, cli_group=None)
+
+# Storage directory for PRDs
 PRD_DIR = Path("generated_prds")
-PRD_DIR.mkdir(exist_ok=True)
+
+# Server-side state (aggregates, indexes) kept out of the PRD archive
+STATE_DIR = Path(os.environ.get('RPG_STATE_DIR', 'rpg_state'))
+
+# Question schema shared by the client, the server-side renderer and analytics
+QUESTIONS = [
+    # Part 1: The Soul of the Product
+    {
+        "section": "The Soul of the Product",
+        "number": 1,
+        "text": "The One-Liner",
+        "hint": "In 10 words or less, what does this thing DO?",
+        "timer": "30 seconds - no overthinking"
+    },
+    {
+        "section": "The Soul of the Product",
+        "number": 2,
+        "text": "The Emotional Hook",
+        "hint": "What feeling should users have in the first 10 seconds of interaction?"
+    },
+    {
+        "section": "The Soul of the Product",
+        "number": 3,
+        "text": "The 'Holy Shit' Moment",
+        "hint": "What's the ONE feature that makes someone text their friend about this?"
+    },
+    {
+        "section": "The Soul of the Product",
+        "number": 4,
+        "text": "The Non-Negotiable",
+        "hint": "What's the single quality that, if compromised, kills the entire product?"
+    },
+    {
+        "section": "The Beautiful Constraint",
+        "number": 5,
+        "text": "Primary Interface",
+        "hint": "What's the MAIN way users interact? (touch/voice/gesture/CLI/web/physical)"
+    },
+    {
+        "section": "The Beautiful Constraint",
+        "number": 6,
+        "text": "The 80% Use Case",
+        "hint": "What will 80% of users do 80% of the time?"
+    },
+    {
+        "section": "The Beautiful Constraint",
+        "number": 7,
+        "text": "The Deletion Test",
+        "hint": "If you could only ship THREE features, which three?"
+    },
+    {
+        "section": "The Beautiful Constraint",
+        "number": 8,
+        "text": "The Grandma Test",
+        "hint": "Can you explain this to a grandma in one sentence? (If no, simplify)"
+    },
+    # Part 2: The Experience Architecture
+    {
+        "section": "User Journey Crystallization",
+        "number": 9,
+        "text": "First Touch",
+        "hint": "Describe the EXACT first 60 seconds of user experience (every tap, every screen)"
+    },
+    {
+        "section": "User Journey Crystallization",
+        "number": 10,
+        "text": "The Learning Cliff",
+        "hint": "What does the user need to know BEFORE they start? (aim for: nothing)"
+    },
+    {
+        "section": "User Journey Crystallization",
+        "number": 11,
+        "text": "The Payoff Timeline",
+        "hint": "How long until they get value? (Target: <2 minutes)"
+    },
+    {
+        "section": "User Journey Crystallization",
+        "number": 12,
+        "text": "The Daily Ritual",
+        "hint": "Why would someone use this tomorrow? And next week?"
+    },
+    {
+        "section": "Technical Beauty Standards",
+        "number": 13,
+        "text": "Response Religion",
+        "hint": "Maximum acceptable latency for primary action? (OP-1: instant, Tesla: <100ms)"
+    },
+    {
+        "section": "Technical Beauty Standards",
+        "number": 14,
+        "text": "Failure Grace",
+        "hint": "When things break, what's the user experience? (Don't say 'it won't break')"
+    },
+    {
+        "section": "Technical Beauty Standards",
+        "number": 15,
+        "text": "The Ambient State",
+        "hint": "What does it look/do when nobody's using it?"
+    },
+    {
+        "section": "Technical Beauty Standards",
+        "number": 16,
+        "text": "Physical Presence",
+        "hint": "Any physical indicators/feedback? (LEDs, sounds, haptics, display)"
+    },
+    # Part 3: The Build Specification
+    {
+        "section": "System Architecture Lightning Round",
+        "number": 17,
+        "text": "Hardware Stack",
+        "hint": "List every physical component needed (be exhaustive)"
+    },
+    {
+        "section": "System Architecture Lightning Round",
+        "number": 18,
+        "text": "Software Services",
+        "hint": "List every daemon/service/process that must run"
+    },
+    {
+        "section": "System Architecture Lightning Round",
+        "number": 19,
+        "text": "Network Topology",
+        "hint": "Draw the network in words (who talks to what, how)"
+    },
+    {
+        "section": "System Architecture Lightning Round",
+        "number": 20,
+        "text": "Data Flows",
+        "hint": "What information moves where? (user input → processing → output)"
+    },
+    {
+        "section": "State & Persistence",
+        "number": 21,
+        "text": "State Management",
+        "hint": "What needs to be remembered between sessions?"
+    },
+    {
+        "section": "State & Persistence",
+        "number": 22,
+        "text": "Reset Behavior",
+        "hint": "What happens after power cycle?"
+    },
+    {
+        "section": "State & Persistence",
+        "number": 23,
+        "text": "Multi-User Reality",
+        "hint": "Can multiple people use simultaneously? How?"
+    },
+    {
+        "section": "State & Persistence",
+        "number": 24,
+        "text": "Progress Indicators",
+        "hint": "How does the system show what's happening? (visual/audio/network)"
+    },
+    # Part 4: The Implementation Accelerators
+    {
+        "section": "Concrete Deliverables",
+        "number": 25,
+        "text": "File System Layout",
+        "hint": "Where does everything live? (/etc/, /var/, /opt/, etc.)"
+    },
+    {
+        "section": "Concrete Deliverables",
+        "number": 26,
+        "text": "Configuration Baseline",
+        "hint": "List every config file and its primary purpose"
+    },
+    {
+        "section": "Concrete Deliverables",
+        "number": 27,
+        "text": "Security Posture",
+        "hint": "Default passwords? Open ports? Intentional vulnerabilities?"
+    },
+    {
+        "section": "Concrete Deliverables",
+        "number": 28,
+        "text": "Testing Victory",
+        "hint": "How do you know it works? (specific, measurable outcomes)"
+    },
+    {
+        "section": "Automation Prerequisites",
+        "number": 29,
+        "text": "Environment Variables",
+        "hint": "What must be configurable?"
+    },
+    {
+        "section": "Automation Prerequisites",
+        "number": 30,
+        "text": "Bootstrap Sequence",
+        "hint": "Order of operations from blank Pi to working product?"
+    },
+    {
+        "section": "Automation Prerequisites",
+        "number": 31,
+        "text": "Dependency Chain",
+        "hint": "What must exist before what? (network before services, etc.)"
+    },
+    {
+        "section": "Automation Prerequisites",
+        "number": 32,
+        "text": "Health Checks",
+        "hint": "How does the system verify it's working correctly?"
+    },
+    # Part 5: The Lovability Layer
+    {
+        "section": "The Polish That Matters",
+        "number": 33,
+        "text": "The Delight Detail",
+        "hint": "One small thing that's unnecessarily perfect (OP-1's knobs, iPhone's rubber-band scroll)"
+    },
+    {
+        "section": "The Polish That Matters",
+        "number": 34,
+        "text": "The Power User Secret",
+        "hint": "One hidden feature for advanced users to discover"
+    },
+    {
+        "section": "The Polish That Matters",
+        "number": 35,
+        "text": "The Personality Tell",
+        "hint": "How does this product's personality show? (error messages, waiting states, success celebrations)"
+    },
+    {
+        "section": "The Polish That Matters",
+        "number": 36,
+        "text": "The Unboxing",
+        "hint": "First boot experience - what happens when it powers on fresh?"
+    },
+    {
+        "section": "The Reality Check",
+        "number": 37,
+        "text": "The Minimum Lovable",
+        "hint": "Below what threshold does this become unusable/unlovable?"
+    },
+    {
+        "section": "The Reality Check",
+        "number": 38,
+        "text": "The Expansion Hook",
+        "hint": "What's the OBVIOUS next feature you're intentionally NOT building now?"
+    },
+    {
+        "section": "The Reality Check",
+        "number": 39,
+        "text": "The Success Metric",
+        "hint": "ONE number that tells you if this worked"
+    },
+    {
+        "section": "The Reality Check",
+        "number": 40,
+        "text": "The Kill Switch",
+        "hint": "How does someone gracefully stop/reset everything?"
+    }
+]
 
 # HTML Template (embedded for single-file deployment)
 HTML_TEMPLATE = """<!DOCTYPE html>
@@ -96,6 +385,27 @@ HTML_TEMPLATE = """<!DOCTYPE html>
             font-weight: 400;
         }
         
+        .session-link {
+            display: inline-block;
+            margin-top: 8px;
+            color: var(--gray);
+            font-size: 14px;
+        }
+        
+        .preview-pane {
+            margin-top: 30px;
+            padding: 24px;
+            background: var(--light-gray);
+            border-radius: 12px;
+            font-size: 15px;
+        }
+        
+        .preview-pane h1 { font-size: 22px; margin-bottom: 16px; }
+        .preview-pane h2 { font-size: 18px; margin: 24px 0 12px; }
+        .preview-pane h3 { font-size: 15px; margin-top: 16px; }
+        .preview-pane .hint { color: var(--gray); font-style: italic; }
+        .preview-pane .missing { color: var(--gray); }
+        
         .progress-bar {
             height: 4px;
             background: var(--light-gray);
@@ -307,6 +617,9 @@ HTML_TEMPLATE = """<!DOCTYPE html>
         <div class="header">
             <h1>Rapid Prototype Genesis™</h1>
             <p class="subtitle">From Vision to Lovable Prototype in One Day</p>
+            <a href="#" class="session-link" onclick="shareSession(); return false;">Continue on another device</a>
+            &nbsp;·&nbsp;
+            <a href="#" class="session-link" onclick="togglePreview(); return false;">Preview PRD</a>
         </div>
         
         <div class="progress-bar">
@@ -314,265 +627,36 @@ HTML_TEMPLATE = """<!DOCTYPE html>
         </div>
         
         <div id="questionContainer"></div>
+        <div id="previewPane" class="preview-pane" style="display: none;"></div>
     </div>
     
     <div class="toast" id="toast"></div>
     
     <script>
-        const questions = [
-            // Part 1: The Soul of the Product
-            {
-                section: "The Soul of the Product",
-                number: 1,
-                text: "The One-Liner",
-                hint: "In 10 words or less, what does this thing DO?",
-                timer: "30 seconds - no overthinking"
-            },
-            {
-                section: "The Soul of the Product",
-                number: 2,
-                text: "The Emotional Hook",
-                hint: "What feeling should users have in the first 10 seconds of interaction?"
-            },
-            {
-                section: "The Soul of the Product",
-                number: 3,
-                text: "The 'Holy Shit' Moment",
-                hint: "What's the ONE feature that makes someone text their friend about this?"
-            },
-            {
-                section: "The Soul of the Product",
-                number: 4,
-                text: "The Non-Negotiable",
-                hint: "What's the single quality that, if compromised, kills the entire product?"
-            },
-            {
-                section: "The Beautiful Constraint",
-                number: 5,
-                text: "Primary Interface",
-                hint: "What's the MAIN way users interact? (touch/voice/gesture/CLI/web/physical)"
-            },
-            {
-                section: "The Beautiful Constraint",
-                number: 6,
-                text: "The 80% Use Case",
-                hint: "What will 80% of users do 80% of the time?"
-            },
-            {
-                section: "The Beautiful Constraint",
-                number: 7,
-                text: "The Deletion Test",
-                hint: "If you could only ship THREE features, which three?"
-            },
-            {
-                section: "The Beautiful Constraint",
-                number: 8,
-                text: "The Grandma Test",
-                hint: "Can you explain this to a grandma in one sentence? (If no, simplify)"
-            },
-            // Part 2: The Experience Architecture
-            {
-                section: "User Journey Crystallization",
-                number: 9,
-                text: "First Touch",
-                hint: "Describe the EXACT first 60 seconds of user experience (every tap, every screen)"
-            },
-            {
-                section: "User Journey Crystallization",
-                number: 10,
-                text: "The Learning Cliff",
-                hint: "What does the user need to know BEFORE they start? (aim for: nothing)"
-            },
-            {
-                section: "User Journey Crystallization",
-                number: 11,
-                text: "The Payoff Timeline",
-                hint: "How long until they get value? (Target: <2 minutes)"
-            },
-            {
-                section: "User Journey Crystallization",
-                number: 12,
-                text: "The Daily Ritual",
-                hint: "Why would someone use this tomorrow? And next week?"
-            },
-            {
-                section: "Technical Beauty Standards",
-                number: 13,
-                text: "Response Religion",
-                hint: "Maximum acceptable latency for primary action? (OP-1: instant, Tesla: <100ms)"
-            },
-            {
-                section: "Technical Beauty Standards",
-                number: 14,
-                text: "Failure Grace",
-                hint: "When things break, what's the user experience? (Don't say 'it won't break')"
-            },
-            {
-                section: "Technical Beauty Standards",
-                number: 15,
-                text: "The Ambient State",
-                hint: "What does it look/do when nobody's using it?"
-            },
-            {
-                section: "Technical Beauty Standards",
-                number: 16,
-                text: "Physical Presence",
-                hint: "Any physical indicators/feedback? (LEDs, sounds, haptics, display)"
-            },
-            // Part 3: The Build Specification
-            {
-                section: "System Architecture Lightning Round",
-                number: 17,
-                text: "Hardware Stack",
-                hint: "List every physical component needed (be exhaustive)"
-            },
-            {
-                section: "System Architecture Lightning Round",
-                number: 18,
-                text: "Software Services",
-                hint: "List every daemon/service/process that must run"
-            },
-            {
-                section: "System Architecture Lightning Round",
-                number: 19,
-                text: "Network Topology",
-                hint: "Draw the network in words (who talks to what, how)"
-            },
-            {
-                section: "System Architecture Lightning Round",
-                number: 20,
-                text: "Data Flows",
-                hint: "What information moves where? (user input → processing → output)"
-            },
-            {
-                section: "State & Persistence",
-                number: 21,
-                text: "State Management",
-                hint: "What needs to be remembered between sessions?"
-            },
-            {
-                section: "State & Persistence",
-                number: 22,
-                text: "Reset Behavior",
-                hint: "What happens after power cycle?"
-            },
-            {
-                section: "State & Persistence",
-                number: 23,
-                text: "Multi-User Reality",
-                hint: "Can multiple people use simultaneously? How?"
-            },
-            {
-                section: "State & Persistence",
-                number: 24,
-                text: "Progress Indicators",
-                hint: "How does the system show what's happening? (visual/audio/network)"
-            },
-            // Part 4: The Implementation Accelerators
-            {
-                section: "Concrete Deliverables",
-                number: 25,
-                text: "File System Layout",
-                hint: "Where does everything live? (/etc/, /var/, /opt/, etc.)"
-            },
-            {
-                section: "Concrete Deliverables",
-                number: 26,
-                text: "Configuration Baseline",
-                hint: "List every config file and its primary purpose"
-            },
-            {
-                section: "Concrete Deliverables",
-                number: 27,
-                text: "Security Posture",
-                hint: "Default passwords? Open ports? Intentional vulnerabilities?"
-            },
-            {
-                section: "Concrete Deliverables",
-                number: 28,
-                text: "Testing Victory",
-                hint: "How do you know it works? (specific, measurable outcomes)"
-            },
-            {
-                section: "Automation Prerequisites",
-                number: 29,
-                text: "Environment Variables",
-                hint: "What must be configurable?"
-            },
-            {
-                section: "Automation Prerequisites",
-                number: 30,
-                text: "Bootstrap Sequence",
-                hint: "Order of operations from blank Pi to working product?"
-            },
-            {
-                section: "Automation Prerequisites",
-                number: 31,
-                text: "Dependency Chain",
-                hint: "What must exist before what? (network before services, etc.)"
-            },
-            {
-                section: "Automation Prerequisites",
-                number: 32,
-                text: "Health Checks",
-                hint: "How does the system verify it's working correctly?"
-            },
-            // Part 5: The Lovability Layer
-            {
-                section: "The Polish That Matters",
-                number: 33,
-                text: "The Delight Detail",
-                hint: "One small thing that's unnecessarily perfect (OP-1's knobs, iPhone's rubber-band scroll)"
-            },
-            {
-                section: "The Polish That Matters",
-                number: 34,
-                text: "The Power User Secret",
-                hint: "One hidden feature for advanced users to discover"
-            },
-            {
-                section: "The Polish That Matters",
-                number: 35,
-                text: "The Personality Tell",
-                hint: "How does this product's personality show? (error messages, waiting states, success celebrations)"
-            },
-            {
-                section: "The Polish That Matters",
-                number: 36,
-                text: "The Unboxing",
-                hint: "First boot experience - what happens when it powers on fresh?"
-            },
-            {
-                section: "The Reality Check",
-                number: 37,
-                text: "The Minimum Lovable",
-                hint: "Below what threshold does this become unusable/unlovable?"
-            },
-            {
-                section: "The Reality Check",
-                number: 38,
-                text: "The Expansion Hook",
-                hint: "What's the OBVIOUS next feature you're intentionally NOT building now?"
-            },
-            {
-                section: "The Reality Check",
-                number: 39,
-                text: "The Success Metric",
-                hint: "ONE number that tells you if this worked"
-            },
-            {
-                section: "The Reality Check",
-                number: 40,
-                text: "The Kill Switch",
-                hint: "How does someone gracefully stop/reset everything?"
-            }
-        ];
+        const questions = __QUESTIONS_JSON__;
         
         let currentQuestion = 0;
         let answers = {};
         let recognition = null;
         let isRecording = false;
         
+        // Server-side draft session, so a participant can switch devices
+        const urlSession = new URLSearchParams(window.location.search).get('session');
+        let sessionId = urlSession || localStorage.getItem('rpg_session');
+        let draftSyncTimer = null;
+        let previewTimer = null;
+        
+        // Finalized voice segments waiting to reach the server, with the next
+        // sequence number per question; both survive a tab crash
+        let transcriptQueue = JSON.parse(localStorage.getItem('rpg_transcript_queue') || '[]');
+        let transcriptSeq = JSON.parse(localStorage.getItem('rpg_transcript_seq') || '{}');
+        let transcriptFlushing = false;
+        
+        // A link to another session: anything queued belongs to the old one
+        if (urlSession && urlSession !== localStorage.getItem('rpg_session')) {
+            resetTranscript();
+        }
+        
         // Initialize speech recognition
         if ('webkitSpeechRecognition' in window || 'SpeechRecognition' in window) {
             const SpeechRecognition = window.SpeechRecognition || window.webkitSpeechRecognition;
@@ -598,6 +682,9 @@ HTML_TEMPLATE = """<!DOCTYPE html>
                 if (finalTranscript) {
                     input.value += finalTranscript;
                     answers[currentQuestion] = input.value;
+                    localStorage.setItem('rpg_answers', JSON.stringify(answers));
+                    // Stream just the new segment instead of re-uploading the draft
+                    queueTranscript(currentQuestion, finalTranscript);
                 }
             };
             
@@ -629,7 +716,7 @@ HTML_TEMPLATE = """<!DOCTYPE html>
                         placeholder="Type your answer or use voice input..."
                         onchange="saveAnswer()"
                         onkeyup="saveAnswer()"
-                    >${answers[currentQuestion] || ''}</textarea>
+                    ></textarea>
                     
                     <div class="controls">
                         ${currentQuestion > 0 ? 
@@ -648,17 +735,198 @@ HTML_TEMPLATE = """<!DOCTYPE html>
                     </div>
                 </div>
             `;
+            // Set as a value rather than markup: answers may come from a shared draft
+            document.getElementById('answerInput').value = answers[currentQuestion] || '';
             
             // Focus on textarea
             setTimeout(() => {
                 document.getElementById('answerInput').focus();
             }, 100);
+            
+            refreshPreview();
+        }
+        
+        function previewOpen() {
+            return document.getElementById('previewPane').style.display !== 'none';
+        }
+        
+        function togglePreview() {
+            const pane = document.getElementById('previewPane');
+            pane.style.display = previewOpen() ? 'none' : 'block';
+            refreshPreview();
+        }
+        
+        function refreshPreview() {
+            clearTimeout(previewTimer);
+            if (!previewOpen()) return;
+            previewTimer = setTimeout(() => {
+                fetch('/api/preview', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ answers: answers })
+                })
+                    .then(res => res.ok ? res.text() : Promise.reject(res.status))
+                    .then(html => {
+                        document.getElementById('previewPane').innerHTML = html;
+                    })
+                    .catch(err => {
+                        console.error('Error loading preview:', err);
+                    });
+            }, 300);
         }
         
         function saveAnswer() {
             const input = document.getElementById('answerInput');
             answers[currentQuestion] = input.value;
             localStorage.setItem('rpg_answers', JSON.stringify(answers));
+            scheduleDraftSync();
+            refreshPreview();
+        }
+        
+        function scheduleDraftSync() {
+            clearTimeout(draftSyncTimer);
+            draftSyncTimer = setTimeout(syncDraft, 1500);
+        }
+        
+        // Draft writes (whole-draft uploads and transcript batches) run one at
+        // a time, so an upload knows exactly which queued segments it covers
+        let draftWrites = Promise.resolve();
+        
+        function serializeDraftWrite(write) {
+            const result = draftWrites.then(write);
+            draftWrites = result.catch(() => {});
+            return result;
+        }
+        
+        function syncDraft() {
+            clearTimeout(draftSyncTimer);
+            return serializeDraftWrite(uploadDraft).catch(err => {
+                console.error('Error syncing draft:', err);
+            });
+        }
+        
+        function uploadDraft() {
+            // The answers already contain every queued segment. The server
+            // restarts each question's sequence at ours, so once the upload is
+            // stored those segments are dropped instead of being appended again.
+            const covered = transcriptQueue.length;
+            const headers = { 'Content-Type': 'application/json' };
+            const body = JSON.stringify({
+                answers: answers,
+                current_question: currentQuestion,
+                transcript_seq: transcriptSeq
+            });
+            const update = sessionId
+                ? fetch(`/api/drafts/${sessionId}`, { method: 'PUT', headers, body })
+                : Promise.resolve({ status: 404 });
+            
+            return update.then(res => {
+                if (res.status !== 404) return res.ok;
+                // No session yet, or it expired: start a new one
+                return fetch('/api/drafts', { method: 'POST', headers, body })
+                    .then(res => res.ok ? res.json() : null)
+                    .then(data => {
+                        if (!data) return false;
+                        sessionId = data.session_id;
+                        localStorage.setItem('rpg_session', sessionId);
+                        return true;
+                    });
+            }).then(stored => {
+                if (stored) {
+                    transcriptQueue = transcriptQueue.slice(covered);
+                    saveTranscriptState();
+                }
+                return stored;
+            });
+        }
+        
+        function saveTranscriptState() {
+            localStorage.setItem('rpg_transcript_queue', JSON.stringify(transcriptQueue));
+            localStorage.setItem('rpg_transcript_seq', JSON.stringify(transcriptSeq));
+        }
+        
+        function resetTranscript() {
+            transcriptQueue = [];
+            transcriptSeq = {};
+            saveTranscriptState();
+        }
+        
+        function queueTranscript(question, text) {
+            const seq = transcriptSeq[question] || 0;
+            transcriptSeq[question] = seq + 1;
+            transcriptQueue.push({ question: question, seq: seq, text: text });
+            saveTranscriptState();
+            flushTranscript();
+        }
+        
+        function flushTranscript() {
+            if (transcriptFlushing || !transcriptQueue.length) return;
+            transcriptFlushing = true;
+            serializeDraftWrite(sendTranscriptBatch).then(() => {
+                transcriptFlushing = false;
+                flushTranscript();
+            }).catch(err => {
+                console.error('Error sending transcript:', err);
+                transcriptFlushing = false;
+                // Resent later with the same sequence numbers; the server drops replays
+                setTimeout(flushTranscript, 3000);
+            });
+        }
+        
+        function uploadDraftOrFail() {
+            return uploadDraft().then(stored => {
+                if (!stored) throw new Error('Draft unavailable');
+            });
+        }
+        
+        function sendTranscriptBatch() {
+            // An upload that ran while this was waiting may have covered the queue
+            if (!transcriptQueue.length) return;
+            if (!sessionId) {
+                // Creating the draft uploads the answers, queued text included
+                return uploadDraftOrFail();
+            }
+            
+            const batch = transcriptQueue.slice(0, 50);
+            return fetch(`/api/drafts/${sessionId}/transcript`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ segments: batch })
+            }).then(res => {
+                // Draft expired (404), or out of step with the server (409):
+                // upload the whole draft once, which also realigns the sequence
+                if (res.status === 404 || res.status === 409) return uploadDraftOrFail();
+                if (res.status >= 400 && res.status < 500 && res.status !== 429) {
+                    // Rejected outright, so retrying cannot help: the upload carries
+                    // the text if the server accepts it, otherwise the batch is dropped
+                    return uploadDraft().then(stored => {
+                        if (stored) return;
+                        console.error(`Dropping ${batch.length} transcript segments: HTTP ${res.status}`);
+                        transcriptQueue = transcriptQueue.slice(batch.length);
+                        saveTranscriptState();
+                    });
+                }
+                if (!res.ok) throw new Error(`HTTP ${res.status}`);
+                transcriptQueue = transcriptQueue.slice(batch.length);
+                saveTranscriptState();
+            });
+        }
+        
+        function shareSession() {
+            saveAnswer();
+            syncDraft().then(() => {
+                if (!sessionId) {
+                    showToast('Could not start a session. Please try again.');
+                    return;
+                }
+                const link = `${window.location.origin}/?session=${sessionId}`;
+                if (navigator.clipboard) {
+                    navigator.clipboard.writeText(link);
+                    showToast('Link copied - open it on your other device');
+                } else {
+                    prompt('Open this link on your other device:', link);
+                }
+            });
         }
         
         function nextQuestion() {
@@ -781,24 +1049,47 @@ HTML_TEMPLATE = """<!DOCTYPE html>
                         <ol style="padding-left: 20px; color: var(--gray);">
                             <li>Review your PRD for completeness</li>
                             <li>Share with your implementation team</li>
-                            <li>Generate your Ansible playbook</li>
+                            <li id="playbookStep">Generate your Ansible playbook</li>
                             <li>Ship today!</li>
                         </ol>
                     </div>
                 </div>
             `;
             
-            // Save to backend
+            // Save to backend, as a revision of the last PRD from this session
+            savePRD({
+                markdown: markdown,
+                answers: answers,
+                timestamp: new Date().toISOString(),
+                parent: localStorage.getItem('rpg_prd_id') || undefined
+            });
+        }
+        
+        function savePRD(payload) {
             fetch('/save-prd', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ 
-                    markdown: markdown,
-                    answers: answers,
-                    timestamp: new Date().toISOString()
-                })
-            }).then(() => {
-                showToast('PRD saved successfully!');
+                body: JSON.stringify(payload)
+            }).then(res => {
+                if (res.status === 400 && payload.parent) {
+                    // Parent no longer on the server: save as a new PRD instead
+                    savePRD({ ...payload, parent: undefined });
+                    return;
+                }
+                if (res.ok) {
+                    res.json().then(data => {
+                        localStorage.setItem('rpg_prd_id', data.id);
+                        const step = document.getElementById('playbookStep');
+                        if (step) {
+                            step.innerHTML = `<a href="/api/prds/${data.id}/playbook.yml" download>Generate your Ansible playbook</a>`;
+                        }
+                    });
+                    showToast('PRD saved successfully!');
+                } else if (res.status === 429 || res.status === 503) {
+                    showToast('Server is busy - PRD not saved. Download it above.');
+                } else {
+                    showToast('PRD could not be saved. Download it above.');
+                }
             }).catch(err => {
                 console.error('Error saving PRD:', err);
             });
@@ -809,6 +1100,13 @@ HTML_TEMPLATE = """<!DOCTYPE html>
                 currentQuestion = 0;
                 answers = {};
                 localStorage.removeItem('rpg_answers');
+                localStorage.removeItem('rpg_prd_id');
+                resetTranscript();
+                if (sessionId) {
+                    fetch(`/api/drafts/${sessionId}`, { method: 'DELETE' });
+                    sessionId = null;
+                    localStorage.removeItem('rpg_session');
+                }
                 renderQuestion();
             }
         }
@@ -840,6 +1138,33 @@ HTML_TEMPLATE = """<!DOCTYPE html>
         
         // Initialize
         renderQuestion();
+        flushTranscript();
+        
+        // Opened from a "continue on another device" link: pull the draft
+        if (urlSession) {
+            localStorage.setItem('rpg_session', urlSession);
+            fetch(`/api/drafts/${urlSession}`)
+                .then(res => res.ok ? res.json() : null)
+                .then(draft => {
+                    if (!draft) {
+                        showToast('That session has expired');
+                        return;
+                    }
+                    answers = draft.answers;
+                    currentQuestion = draft.current_question;
+                    localStorage.setItem('rpg_answers', JSON.stringify(answers));
+                    // Continue each question's voice segments where the other device left off
+                    Object.entries(draft.transcript_seq || {}).forEach(([question, seq]) => {
+                        transcriptSeq[question] = Math.max(transcriptSeq[question] || 0, seq);
+                    });
+                    saveTranscriptState();
+                    renderQuestion();
+                    showToast('Session restored');
+                })
+                .catch(err => {
+                    console.error('Error loading draft:', err);
+                });
+        }
         
         // Register service worker for PWA
         if ('serviceWorker' in navigator) {
@@ -853,46 +1178,34 @@ HTML_TEMPLATE = """<!DOCTYPE html>
 </body>
 </html>"""
 
-@app.route('/')
-def index():
-    """Serve the main PWA application"""
-    return HTML_TEMPLATE
-
-@app.route('/manifest.json')
-def manifest():
-    """Serve PWA manifest"""
-    manifest_data = {
-        "name": "Rapid Prototype Genesis",
-        "short_name": "RPG",
-        "description": "From Vision to Lovable Prototype in One Day",
-        "start_url": "/",
-        "display": "standalone",
-        "theme_color": "#000000",
-        "background_color": "#ffffff",
-        "orientation": "portrait",
-        "icons": [
-            {
-                "src": "/icon-192.png",
-                "sizes": "192x192",
-                "type": "image/png",
-                "purpose": "any maskable"
-            },
-            {
-                "src": "/icon-512.png",
-                "sizes": "512x512",
-                "type": "image/png"
-            }
-        ]
-    }
-    response = make_response(json.dumps(manifest_data, indent=2))
-    response.headers['Content-Type'] = 'application/manifest+json'
-    return response
+# PWA manifest and service worker, served from precompressed assets
+MANIFEST_DATA = {
+    "name": "Rapid Prototype Genesis",
+    "short_name": "RPG",
+    "description": "From Vision to Lovable Prototype in One Day",
+    "start_url": "/",
+    "display": "standalone",
+    "theme_color": "#000000",
+    "background_color": "#ffffff",
+    "orientation": "portrait",
+    "icons": [
+        {
+            "src": "/icon-192.png",
+            "sizes": "192x192",
+            "type": "image/png",
+            "purpose": "any maskable"
+        },
+        {
+            "src": "/icon-512.png",
+            "sizes": "512x512",
+            "type": "image/png"
+        }
+    ]
+}
 
-@app.route('/sw.js')
-def service_worker():
-    """Serve service worker for offline functionality"""
-    sw_content = """
-const CACHE_NAME = 'rpg-v1';
+SERVICE_WORKER_JS = """
+// Named after the page's ETag, so every client change ships a new worker
+const CACHE_NAME = 'rpg-__INDEX_ETAG__';
 const urlsToCache = [
     '/',
     '/manifest.json'
@@ -902,10 +1215,28 @@ self.addEventListener('install', event => {
     event.waitUntil(
         caches.open(CACHE_NAME)
             .then(cache => cache.addAll(urlsToCache))
+            .then(() => self.skipWaiting())
     );
 });
 
 self.addEventListener('fetch', event => {
+    if (event.request.method !== 'GET') return;
+    if (event.request.mode === 'navigate' && new URL(event.request.url).pathname === '/') {
+        // Network first, so returning users get the current page; the cached
+        // copy is only the offline fallback
+        event.respondWith(
+            fetch(event.request)
+                .then(response => {
+                    if (response.ok) {
+                        const copy = response.clone();
+                        caches.open(CACHE_NAME).then(cache => cache.put('/', copy));
+                    }
+                    return response;
+                })
+                .catch(() => caches.match('/'))
+        );
+        return;
+    }
     event.respondWith(
         caches.match(event.request)
             .then(response => {
@@ -927,19 +1258,14 @@ self.addEventListener('activate', event => {
                     return caches.delete(cacheName);
                 })
             );
-        })
+        }).then(() => self.clients.claim())
     );
 });
 """
-    response = make_response(sw_content)
-    response.headers['Content-Type'] = 'application/javascript'
-    response.headers['Service-Worker-Allowed'] = '/'
-    return response
 
-@app.route('/icon-<int:size>.png')
-def icon(size):
-    """Generate PWA icons dynamically (SVG placeholder)"""
-    svg_content = f"""
+def icon_svg(size):
+    """Render the PWA icon (SVG placeholder) at a given size"""
+    return f"""
 <svg width="{size}" height="{size}" viewBox="0 0 100 100" xmlns="http://www.w3.org/2000/svg">
     <rect width="100" height="100" fill="#000000"/>
     <text x="50" y="50" font-family="SF Pro Display, -apple-system, sans-serif" 
@@ -947,58 +1273,2423 @@ def icon(size):
           text-anchor="middle" dominant-baseline="middle">⚡</text>
 </svg>
 """
-    response = make_response(svg_content)
+
+# Immutable responses built once by warm_up(); under gunicorn --preload this
+# happens in the master and workers share the bytes copy-on-write
+ASSETS = {}
+ICON_SIZES = (192, 512)
+
+def _asset(body, content_type, **headers):
+    data = body.encode('utf-8')
+    return {
+        'body': data,
+        'gzip': gzip.compress(data, compresslevel=9, mtime=0),
+        'etag': hashlib.sha256(data).hexdigest()[:32],
+        'headers': {'Content-Type': content_type, **headers}
+    }
+
+def build_assets():
+    """Render and precompress every static response"""
+    index_html = HTML_TEMPLATE.replace(
+        '__QUESTIONS_JSON__', json.dumps(QUESTIONS, indent=4).replace('\n', '\n        ')
+    )
+    index = _asset(index_html, 'text/html; charset=utf-8')
+    assets = {
+        'index': index,
+        'manifest': _asset(json.dumps(MANIFEST_DATA, indent=2), 'application/manifest+json'),
+        'sw': _asset(
+            SERVICE_WORKER_JS.replace('__INDEX_ETAG__', index['etag'][:12]),
+            'application/javascript',
+            **{'Service-Worker-Allowed': '/', 'Cache-Control': 'no-cache'}
+        )
+    }
+    for size in ICON_SIZES:
+        assets[f"icon-{size}"] = _asset(icon_svg(size), 'image/svg+xml')
+    return assets
+
+def asset_response(name):
+    """Serve a prebuilt asset, gzipped when the client accepts it"""
+    asset = ASSETS[name]
+    if request.if_none_match.contains(asset['etag']):
+        return '', 304
+    use_gzip = request.accept_encodings['gzip'] > 0
+    response = make_response(asset['gzip'] if use_gzip else asset['body'])
+    response.headers.update(asset['headers'])
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.set_etag(asset['etag'])
+    return response
+
+@bp.route('/')
+def index():
+    """Serve the main PWA application"""
+    return asset_response('index')
+
+@bp.route('/manifest.json')
+def manifest():
+    """Serve PWA manifest"""
+    return asset_response('manifest')
+
+@bp.route('/sw.js')
+def service_worker():
+    """Serve service worker for offline functionality"""
+    return asset_response('sw')
+
+@bp.route('/icon-<int:size>.png')
+def icon(size):
+    """Generate PWA icons dynamically (SVG placeholder)"""
+    if f"icon-{size}" in ASSETS:
+        return asset_response(f"icon-{size}")
+    response = make_response(icon_svg(size))
     response.headers['Content-Type'] = 'image/svg+xml'
     return response
 
-@app.route('/save-prd', methods=['POST'])
+CROCKFORD_BASE32 = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+
+_ulid_lock = threading.Lock()
+_ulid_last = [0, 0]
+
+def new_submission_id():
+    """Return a time-ordered, ULID-style submission id.
+
+    48 bits of milliseconds followed by 80 random bits, Crockford base32
+    encoded. Ids minted in the same millisecond by this process increment the
+    random part, so they stay strictly increasing.
+    """
+    with _ulid_lock:
+        ms = time.time_ns() // 1_000_000
+        if ms <= _ulid_last[0]:
+            ms, rand = _ulid_last[0], _ulid_last[1] + 1
+        else:
+            rand = int.from_bytes(os.urandom(10), 'big')
+        _ulid_last[:] = [ms, rand]
+    value = (ms << 80) | (rand & ((1 << 80) - 1))
+    return ''.join(CROCKFORD_BASE32[(value >> shift) & 31] for shift in range(125, -1, -5))
+
+def atomic_write(path, data, exclusive=False):
+    """Write bytes to path so readers only ever see the complete file.
+
+    Data goes to an O_EXCL temp file in the same directory, is fsynced, then
+    published with os.replace, or with os.link when `exclusive` so an
+    existing file is never clobbered (FileExistsError instead). The directory
+    is fsynced last so the new entry itself survives a crash.
+    """
+    tmp_path = path.parent / f".{path.name}.{os.getpid()}.{os.urandom(4).hex()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            with trace_span('fsync'):
+                os.fsync(f.fileno())
+        if exclusive:
+            os.link(tmp_path, path)
+        else:
+            os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    dir_fd = os.open(path.parent, os.O_RDONLY)
+    try:
+        with trace_span('fsync'):
+            os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+def store_prd(markdown, answers, timestamp, sid=None, lineage=None):
+    """Write a PRD and its answers to the archive, returning (id, markdown filename).
+
+    New submissions get a fresh server-generated id; pass `sid` to rewrite an
+    existing one in place. The answers file is written last, so a submission
+    is only visible once both artifacts are complete. `lineage` carries the
+    revision fields (parent, depth and, for delta revisions, the delta that
+    replaces both the answers and the markdown file).
+    """
+    lineage = lineage or {}
+    exclusive = sid is None
+    while True:
+        if exclusive:
+            sid = new_submission_id()
+        filename = f"PRD_{sid}.md" if markdown is not None else None
+        with trace_span('serialize'):
+            record = {'timestamp': timestamp}
+            if 'delta' not in lineage:
+                record['answers'] = answers
+            record['markdown_file'] = filename
+            record.update(lineage)
+            record_bytes = json.dumps(record, indent=2).encode('utf-8')
+            markdown_bytes = markdown.encode('utf-8') if filename else None
+        try:
+            # Save markdown file
+            if filename:
+                with trace_span('write_md'):
+                    atomic_write(PRD_DIR / filename, markdown_bytes, exclusive)
+            
+            # Save answers as JSON for potential reuse
+            with trace_span('write_json'):
+                atomic_write(
+                    PRD_DIR / f"answers_{sid}.json", record_bytes, exclusive and filename is None
+                )
+            return sid, filename
+        except FileExistsError:
+            continue
+
+QUESTION_KEY = re.compile(r'0|[1-9][0-9]*')
+
+def validate_answers(answers):
+    """Check an answers map ({"<question index>": "<text>"}), returning an error or None"""
+    if not isinstance(answers, dict):
+        return 'answers must be an object'
+    if len(answers) > len(QUESTIONS):
+        return f"answers has more than {len(QUESTIONS)} entries"
+    for key, value in answers.items():
+        # ASCII only: str.isdigit() also accepts digits such as '²' that int() rejects
+        if not QUESTION_KEY.fullmatch(key) or int(key) >= len(QUESTIONS):
+            return f"answers key {key[:16]!r} is not a question index"
+        if not isinstance(value, str):
+            return f"answers[{key}] must be a string"
+        if len(value) > MAX_ANSWER_CHARS:
+            return f"answers[{key}] exceeds {MAX_ANSWER_CHARS} characters"
+    return None
+
+def validate_submission(data):
+    """Check a /save-prd payload against the schema, returning an error or None"""
+    if not isinstance(data, dict):
+        return 'Request body must be a JSON object'
+    
+    markdown = data.get('markdown', '')
+    if not isinstance(markdown, str):
+        return 'markdown must be a string'
+    if len(markdown) > MAX_MARKDOWN_CHARS:
+        return f"markdown exceeds {MAX_MARKDOWN_CHARS} characters"
+    
+    error = validate_answers(data.get('answers', {}))
+    if error:
+        return error
+    
+    parent = data.get('parent')
+    if parent is not None and not (isinstance(parent, str) and valid_submission_id(parent)):
+        return 'parent must be a submission id'
+    
+    timestamp = data.get('timestamp')
+    if timestamp is not None:
+        if not isinstance(timestamp, str) or len(timestamp) > MAX_TIMESTAMP_CHARS:
+            return 'timestamp must be an ISO-8601 string'
+        try:
+            parse_timestamp(timestamp)
+        except ValueError:
+            return 'timestamp must be an ISO-8601 string'
+    
+    return None
+
+# ---------------------------------------------------------------------------
+# Request tracing
+# ---------------------------------------------------------------------------
+
+# One JSON line per traced request: access fields plus per-stage spans.
+# Records are handed to a queue and serialized and written by a listener
+# thread, so request threads never block on log I/O. Errors and slow requests
+# are always traced; everything else at RPG_TRACE_SAMPLE_RATE.
+TRACE_SAMPLE_RATE = float(os.environ.get('RPG_TRACE_SAMPLE_RATE', 0.1))
+TRACE_SLOW_MS = float(os.environ.get('RPG_TRACE_SLOW_MS', 500))
+TRACE_LOG = os.environ.get('RPG_TRACE_LOG')
+TRACE_QUEUE_SIZE = 10000
+REQUEST_ID_CHARS = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_.')
+
+trace_logger = logging.getLogger('rpg.trace')
+trace_logger.propagate = False
+trace_logger.setLevel(logging.INFO)
+
+class _TraceQueueHandler(QueueHandler):
+    """Queue records untouched, dropping them rather than blocking when full"""
+
+    dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            type(self).dropped += 1
+
+class _TraceFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps(record.trace, ensure_ascii=False, default=str)
+
+_trace_lock = threading.Lock()
+_trace_pid = None
+
+def _trace_log():
+    """Return the trace logger, starting this process's listener on first use"""
+    global _trace_pid
+    if _trace_pid != os.getpid():
+        with _trace_lock:
+            if _trace_pid != os.getpid():
+                records = queue.Queue(TRACE_QUEUE_SIZE)
+                handler = logging.FileHandler(TRACE_LOG) if TRACE_LOG else logging.StreamHandler(sys.stderr)
+                handler.setFormatter(_TraceFormatter())
+                listener = QueueListener(records, handler)
+                listener.start()
+                atexit.register(listener.stop)
+                # Replaces any handler inherited across a fork along with its dead listener
+                trace_logger.handlers[:] = [_TraceQueueHandler(records)]
+                _trace_pid = os.getpid()
+    return trace_logger
+
+class RequestTrace:
+    """Request id, sampling decision and stage timings for one request"""
+
+    def __init__(self, request_id, sampled):
+        self.request_id = request_id
+        self.sampled = sampled
+        self.started = time.perf_counter()
+        self.spans = []
+        self.error = None
+
+    @contextlib.contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append({
+                'name': name,
+                'start_ms': round((start - self.started) * 1000, 3),
+                'ms': round((time.perf_counter() - start) * 1000, 3)
+            })
+
+def trace_span(name):
+    """Time a stage of the current request (a no-op outside a request)"""
+    trace = g.get('trace') if has_request_context() else None
+    return trace.span(name) if trace is not None else contextlib.nullcontext()
+
+def trace_exception(e):
+    """Attach an exception to the current request's trace, returning the request id"""
+    trace = g.get('trace') if has_request_context() else None
+    if trace is None:
+        return None
+    trace.error = {'type': type(e).__name__, 'message': str(e), 'traceback': traceback.format_exc()}
+    return trace.request_id
+
+@bp.before_app_request
+def start_trace():
+    """Assign a request id and decide whether this request is sampled"""
+    request_id = request.headers.get('X-Request-ID', '')
+    if not (0 < len(request_id) <= 64 and set(request_id) <= REQUEST_ID_CHARS):
+        request_id = uuid.uuid4().hex
+    g.trace = RequestTrace(request_id, random.random() < TRACE_SAMPLE_RATE)
+
+@bp.after_app_request
+def finish_trace(response):
+    """Echo the request id and emit the access/trace record"""
+    trace = g.get('trace')
+    if trace is None:
+        return response
+    response.headers['X-Request-ID'] = trace.request_id
+    duration_ms = (time.perf_counter() - trace.started) * 1000
+    if (trace.sampled or trace.error or response.status_code >= 500
+            or duration_ms >= TRACE_SLOW_MS):
+        _trace_log().info('request', extra={'trace': {
+            'ts': utc_now_iso(),
+            'request_id': trace.request_id,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(duration_ms, 3),
+            'remote_addr': request.remote_addr,
+            'bytes_in': request.content_length,
+            'sampled': trace.sampled,
+            'pid': os.getpid(),
+            'spans': trace.spans,
+            'error': trace.error
+        }})
+    return response
+
+# Endpoints whose JSON bodies are screened by reject_oversized_submissions()
+JSON_WRITE_ENDPOINTS = {
+    'rpg.save_prd', 'rpg.create_draft', 'rpg.update_draft', 'rpg.ingest_transcript', 'rpg.preview'
+}
+
+@bp.before_app_request
+def reject_oversized_submissions():
+    """Refuse oversized or non-JSON writes from the headers, before reading the body"""
+    if request.method not in ('POST', 'PUT') or request.endpoint not in JSON_WRITE_ENDPOINTS:
+        return None
+    if request.content_length is not None and request.content_length > MAX_SUBMISSION_BYTES:
+        return jsonify({
+            'success': False,
+            'error': f"Request body exceeds {MAX_SUBMISSION_BYTES} bytes"
+        }), 413
+    if not request.is_json:
+        return jsonify({
+            'success': False,
+            'error': 'Content-Type must be application/json'
+        }), 415
+    return None
+
+@bp.app_errorhandler(413)
+def request_too_large(e):
+    """Report bodies that exceed MAX_CONTENT_LENGTH while streaming"""
+    return jsonify({
+        'success': False,
+        'error': f"Request body exceeds {MAX_SUBMISSION_BYTES} bytes"
+    }), 413
+
+# Token-bucket admission control for write endpoints. Buckets live in a small
+# SQLite file so every gunicorn worker draws from the same budget; a rate of 0
+# disables that bucket. PRD saves and draft autosaves have separate budgets so
+# frequent draft writes cannot starve saves.
+RATE_LIMIT_DB = STATE_DIR / 'ratelimit.db'
+RATE_PER_IP = float(os.environ.get('RPG_RATE_PER_IP', 0.5))
+BURST_PER_IP = float(os.environ.get('RPG_BURST_PER_IP', 10))
+RATE_GLOBAL = float(os.environ.get('RPG_RATE_GLOBAL', 20))
+BURST_GLOBAL = float(os.environ.get('RPG_BURST_GLOBAL', 100))
+DRAFT_RATE_PER_IP = float(os.environ.get('RPG_DRAFT_RATE_PER_IP', 2))
+DRAFT_BURST_PER_IP = float(os.environ.get('RPG_DRAFT_BURST_PER_IP', 60))
+DRAFT_RATE_GLOBAL = float(os.environ.get('RPG_DRAFT_RATE_GLOBAL', 200))
+DRAFT_BURST_GLOBAL = float(os.environ.get('RPG_DRAFT_BURST_GLOBAL', 1000))
+WRITE_BUDGETS = {
+    'save': (RATE_PER_IP, BURST_PER_IP, RATE_GLOBAL, BURST_GLOBAL),
+    'draft': (DRAFT_RATE_PER_IP, DRAFT_BURST_PER_IP, DRAFT_RATE_GLOBAL, DRAFT_BURST_GLOBAL)
+}
+# Number of trusted reverse proxies in front of the app. Per-IP buckets key on
+# REMOTE_ADDR, which behind a proxy is the proxy itself unless this is set.
+PROXY_HOPS = int(os.environ.get('RPG_PROXY_HOPS', 0))
+
+_local = threading.local()
+
+def sqlite_connect(path, timeout=0.05):
+    """Return this thread's connection to a shared SQLite file.
+
+    Connections are cached per thread and per pid so nothing opened before a
+    fork is reused in a child.
+    """
+    key = str(path)
+    connections = getattr(_local, 'connections', None)
+    if connections is None or connections.get('pid') != os.getpid():
+        connections = _local.connections = {'pid': os.getpid()}
+    conn = connections.get(key)
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        connections[key] = conn
+    return conn
+
+def _ratelimit_db():
+    conn = sqlite_connect(RATE_LIMIT_DB)
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS buckets '
+        '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+    )
+    return conn
+
+def _refill(conn, key, rate, burst, now):
+    row = conn.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+    if row is None:
+        return burst
+    return min(burst, row[0] + (now - row[1]) * rate)
+
+def acquire_write_token(client, budget='save'):
+    """Take one token from the client's bucket and the global bucket of a budget.
+
+    Returns None when admitted, otherwise (status, retry_after_seconds): 429
+    when this client is over its rate, 503 when the server as a whole is.
+    """
+    now = time.time()
+    rate_per_ip, burst_per_ip, rate_global, burst_global = WRITE_BUDGETS[budget]
+    buckets = [
+        (f"{budget}:ip:{client}", rate_per_ip, burst_per_ip, 429),
+        (f"{budget}:global", rate_global, burst_global, 503)
+    ]
+    buckets = [b for b in buckets if b[1] > 0]
+    if not buckets:
+        return None
+    
+    try:
+        conn = _ratelimit_db()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            levels = []
+            for key, rate, burst, status in buckets:
+                tokens = _refill(conn, key, rate, burst, now)
+                if tokens < 1:
+                    conn.execute('ROLLBACK')
+                    return status, (1 - tokens) / rate
+                levels.append((key, tokens - 1))
+            conn.executemany(
+                'INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)',
+                [(key, tokens, now) for key, tokens in levels]
+            )
+            if random.random() < 0.01:
+                # Idle buckets have refilled completely; forget them
+                conn.execute('DELETE FROM buckets WHERE updated < ?', (now - 3600,))
+            conn.execute('COMMIT')
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+    except sqlite3.OperationalError:
+        # The limiter itself is contended: shed load instead of queueing
+        return 503, 1
+    return None
+
+def rate_limited(budget):
+    """Reject requests over a write budget with 429/503 and Retry-After"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            with trace_span('admission'):
+                rejected = acquire_write_token(request.remote_addr or 'unknown', budget)
+            if rejected is not None:
+                status, retry_after = rejected
+                response = jsonify({
+                    'success': False,
+                    'error': 'Too many requests' if status == 429 else 'Server is busy'
+                })
+                response.status_code = status
+                response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+                return response
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+@bp.route('/save-prd', methods=['POST'])
+@rate_limited('save')
 def save_prd():
     """Save generated PRD to server"""
+    with trace_span('parse'):
+        data = request.get_json(silent=True)
+    with trace_span('validate'):
+        error = validate_submission(data)
+    if error:
+        return jsonify({
+            'success': False,
+            'error': error
+        }), 400
+    
     try:
-        data = request.json
         markdown = data.get('markdown', '')
         answers = data.get('answers', {})
-        timestamp = data.get('timestamp', datetime.now().isoformat())
-        
-        # Generate filename
-        filename = f"PRD_{timestamp.replace(':', '-').replace('.', '-')}.md"
-        filepath = PRD_DIR / filename
-        
-        # Save markdown file
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(markdown)
-        
-        # Save answers as JSON for potential reuse
-        json_filename = f"answers_{timestamp.replace(':', '-').replace('.', '-')}.json"
-        json_filepath = PRD_DIR / json_filename
-        with open(json_filepath, 'w', encoding='utf-8') as f:
-            json.dump({
-                'timestamp': timestamp,
-                'answers': answers,
-                'markdown_file': filename
-            }, f, indent=2)
+        timestamp = data.get('timestamp') or datetime.now().isoformat()
         
-        return jsonify({
-            'success': True,
-            'message': 'PRD saved successfully',
-            'filename': filename
-        })
-    
+        parent = data.get('parent')
+        
+        if parent:
+            try:
+                sid, filename = store_revision(markdown, answers, timestamp, parent)
+            except KeyError:
+                return jsonify({
+                    'success': False,
+                    'error': f"Unknown parent {parent}"
+                }), 400
+        else:
+            sid, filename = store_prd(markdown, answers, timestamp)
     except Exception as e:
         return jsonify({
             'success': False,
-            'error': str(e)
+            'error': 'PRD could not be saved',
+            'request_id': trace_exception(e)
         }), 500
+    
+    # The PRD is stored; failing the request now would only invite a duplicate retry
+    try:
+        with trace_span('stats'):
+            update_stats(answers, timestamp)
+    except Exception as e:
+        trace_exception(e)
+    
+    return jsonify({
+        'success': True,
+        'message': 'PRD saved successfully',
+        'id': sid,
+        'filename': filename
+    })
 
-@app.route('/health', methods=['GET'])
+@bp.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'prd_count': len(list(PRD_DIR.glob('*.md')))
+        'prd_count': len(list(PRD_DIR.glob('answers_*.json'))) + packed_count(),
+        'trace_records_dropped': _TraceQueueHandler.dropped
     })
 
+# ---------------------------------------------------------------------------
+# Archive export
+# ---------------------------------------------------------------------------
+
+EXPORT_FORMATS = ('ndjson', 'tar')
+
+def parse_timestamp(value):
+    """Parse an ISO-8601 timestamp (accepting a trailing Z) as an aware UTC datetime"""
+    dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+def utc_now_iso():
+    """Current time as an ISO-8601 string in the client's toISOString() format"""
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+def submission_id(path):
+    """Return the submission id encoded in an answers_*/PRD_* filename"""
+    return path.stem.split('_', 1)[1]
+
+def submission_sort_key(sid):
+    """Order ids chronologically: legacy timestamp ids first, then ULIDs"""
+    return (0, sid) if '-' in sid else (1, sid)
+
+def list_answer_files():
+    """Return every answers_*.json path in submission order"""
+    return sorted(
+        PRD_DIR.glob('answers_*.json'),
+        key=lambda p: submission_sort_key(submission_id(p))
+    )
+
+def iter_submission_ids(cursor=None):
+    """Yield (sort key, id) for each stored submission in id order, without reading it"""
+    loose = (
+        (submission_sort_key(submission_id(path)), submission_id(path))
+        for path in list_answer_files()
+    )
+    previous = None
+    for key, sid in heapq.merge(loose, iter_packed_ids(cursor), key=lambda item: item[0]):
+        if sid != previous:
+            previous = sid
+            yield key, sid
+
+def iter_submissions(since=None, until=None, cursor=None):
+    """Yield (id, record) for each stored submission in id order.
+
+    Only the sorted list of loose filenames is held in memory; packed PRDs are
+    streamed from the segment index and merged in. Each record is read,
+    filtered and handed off one at a time. Delta revisions are yielded with
+    their answers reconstructed.
+    """
+    after = submission_sort_key(cursor) if cursor is not None else None
+    for key, sid in iter_submission_ids(cursor):
+        if after is not None and key <= after:
+            continue
+        try:
+            record = read_submission_record(sid)
+            if 'delta' in record:
+                record = load_submission(sid)
+        except (OSError, ValueError, KeyError):
+            continue
+        if since is not None or until is not None:
+            try:
+                ts = parse_timestamp(record.get('timestamp', ''))
+            except (TypeError, ValueError):
+                continue
+            if since is not None and ts < since:
+                continue
+            if until is not None and ts >= until:
+                continue
+        yield sid, record
+
+def export_ndjson(submissions, include_markdown=False):
+    """Yield one JSON line per submission"""
+    for sid, record in submissions:
+        line = {
+            'id': sid,
+            'timestamp': record.get('timestamp'),
+            'answers': record.get('answers', {}),
+            'markdown_file': record.get('markdown_file')
+        }
+        if include_markdown:
+            line['markdown'] = submission_markdown(sid, record)
+        yield json.dumps(line, ensure_ascii=False) + '\n'
+
+class _StreamBuffer:
+    """Write-only file object that hands buffered bytes back to a generator"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def export_tar(submissions):
+    """Yield a gzipped tar stream of each submission's artifacts.
+
+    Members are written under <id>/ so an interrupted download can be resumed
+    from the id of the last complete directory. Delta revisions are exported
+    with full answers and rendered markdown, packed PRDs with their stored
+    markdown.
+    """
+    buf = _StreamBuffer()
+    with tarfile.open(fileobj=buf, mode='w|gz') as tar:
+        for sid, record in submissions:
+            try:
+                mtime = parse_timestamp(record.get('timestamp', '')).timestamp()
+            except (TypeError, ValueError):
+                mtime = time.time()
+            artifacts = [
+                (f"answers_{sid}.json", json.dumps(record, indent=2)),
+                (record.get('markdown_file') or f"PRD_{sid}.md", submission_markdown(sid, record))
+            ]
+            for name, text in artifacts:
+                data = text.encode('utf-8')
+                info = tarfile.TarInfo(f"{sid}/{name}")
+                info.size = len(data)
+                info.mtime = mtime
+                tar.addfile(info, io.BytesIO(data))
+            chunk = buf.drain()
+            if chunk:
+                yield chunk
+    yield buf.drain()
+
+def _export_params(since, until):
+    """Parse optional since/until bounds, raising ValueError on bad input"""
+    return (
+        parse_timestamp(since) if since else None,
+        parse_timestamp(until) if until else None
+    )
+
+# The HTTP export streams every participant's answers, so it is off unless an
+# admin token is configured; the export-prds CLI needs none
+EXPORT_TOKEN = os.environ.get('RPG_EXPORT_TOKEN')
+
+def export_authorized():
+    """Check the request's bearer token against RPG_EXPORT_TOKEN"""
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    return scheme.lower() == 'bearer' and secrets.compare_digest(token.encode(), EXPORT_TOKEN.encode())
+
+@bp.route('/api/export', methods=['GET'])
+def export_prds():
+    """Stream the PRD archive as NDJSON or tar.gz"""
+    if not EXPORT_TOKEN:
+        return jsonify({
+            'success': False,
+            'error': 'HTTP export is disabled; set RPG_EXPORT_TOKEN or use `flask export-prds`'
+        }), 403
+    if not export_authorized():
+        response = jsonify({'success': False, 'error': 'A valid export token is required'})
+        response.status_code = 401
+        response.headers['WWW-Authenticate'] = 'Bearer'
+        return response
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({
+            'success': False,
+            'error': f"format must be one of: {', '.join(EXPORT_FORMATS)}"
+        }), 400
+    try:
+        since, until = _export_params(request.args.get('since'), request.args.get('until'))
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'since/until must be ISO-8601 timestamps'
+        }), 400
+
+    submissions = iter_submissions(since, until, request.args.get('cursor'))
+    if fmt == 'ndjson':
+        include_markdown = request.args.get('markdown') in ('1', 'true')
+        return Response(
+            stream_with_context(export_ndjson(submissions, include_markdown)),
+            mimetype='application/x-ndjson'
+        )
+    response = Response(stream_with_context(export_tar(submissions)), mimetype='application/gzip')
+    response.headers['Content-Disposition'] = 'attachment; filename=prds.tar.gz'
+    return response
+
+@bp.cli.command('export-prds')
+@click.option('--format', 'fmt', type=click.Choice(EXPORT_FORMATS), default='ndjson')
+@click.option('--since', help='Only include submissions at or after this ISO-8601 timestamp.')
+@click.option('--until', help='Only include submissions before this ISO-8601 timestamp.')
+@click.option('--cursor', help='Resume after this submission id.')
+@click.option('--markdown', 'include_markdown', is_flag=True, help='Embed PRD markdown in NDJSON lines.')
+@click.option('-o', '--output', type=click.Path(dir_okay=False), help='Write to a file instead of stdout.')
+def export_prds_command(fmt, since, until, cursor, include_markdown, output):
+    """Stream the PRD archive as NDJSON or tar.gz"""
+    try:
+        since, until = _export_params(since, until)
+    except ValueError:
+        raise click.BadParameter('since/until must be ISO-8601 timestamps')
+
+    submissions = iter_submissions(since, until, cursor)
+    if fmt == 'ndjson':
+        chunks = (line.encode('utf-8') for line in export_ndjson(submissions, include_markdown))
+    else:
+        chunks = export_tar(submissions)
+
+    out = open(output, 'wb') if output else sys.stdout.buffer
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    finally:
+        if output:
+            out.close()
+        else:
+            out.flush()
+
+# ---------------------------------------------------------------------------
+# Server-side rendering and bulk import
+# ---------------------------------------------------------------------------
+
+PRD_COMMITMENT = """---
+
+## The Rapid Prototype Commitment
+
+- **NO additional features** beyond what's specified
+- **NO perfect-seeking** that delays shipping
+- **NO committees** - one vision, one decision-maker
+- **YES to opinionated defaults**
+- **YES to surprising delight**
+- **YES to shipping TODAY**
+
+*"Real artists ship."* - Steve Jobs
+"""
+
+def _format_generated(dt):
+    """Format a datetime the way the client's toLocaleString() does (en-US)"""
+    hour = dt.hour % 12 or 12
+    meridiem = 'AM' if dt.hour < 12 else 'PM'
+    return f"{dt.month}/{dt.day}/{dt.year}, {hour}:{dt.minute:02d}:{dt.second:02d} {meridiem}"
+
+def render_prd_markdown(answers, timestamp=None):
+    """Render answers into PRD markdown, matching the client's generatePRD()"""
+    try:
+        generated = parse_timestamp(timestamp).astimezone() if timestamp else datetime.now()
+    except ValueError:
+        generated = datetime.now()
+    
+    parts = [
+        '# Rapid Prototype Genesis - Product Requirements Document\n\n',
+        f"*Generated: {_format_generated(generated)}*\n\n",
+        '---\n\n'
+    ]
+    current_section = None
+    for index, q in enumerate(QUESTIONS):
+        if q['section'] != current_section:
+            current_section = q['section']
+            parts.append(f"## {current_section}\n\n")
+        parts.append(f"### {q['number']}. {q['text']}\n")
+        parts.append(f"*{q['hint']}*\n\n")
+        parts.append(f"**Answer:** {answers.get(str(index)) or '(No answer provided)'}\n\n")
+    parts.append(PRD_COMMITMENT)
+    return ''.join(parts)
+
+def _render_answers_file(path, skip_deltas=False):
+    """Pool worker: load an answers file and render its markdown.
+
+    Returns (path, result, error) so one bad file never aborts the pool.
+    Delta revisions have no markdown to render: with skip_deltas they come
+    back with result None, otherwise as an error.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            record = json.load(f)
+        if 'delta' in record:
+            if skip_deltas:
+                return path, None, None
+            return path, None, 'delta revision without its parent'
+        if 'answers' not in record:
+            # Bare {"0": "...", ...} answer maps collected offline
+            record = {'answers': record}
+        answers = record['answers']
+        error = validate_answers(answers)
+        if error:
+            return path, None, error
+        timestamp = record.get('timestamp') or utc_now_iso()
+        return path, {
+            'timestamp': timestamp,
+            'answers': answers,
+            'markdown': render_prd_markdown(answers, timestamp),
+            'lineage': {k: record[k] for k in ('parent', 'depth') if k in record}
+        }, None
+    except Exception as e:
+        return path, None, f"{type(e).__name__}: {e}"
+
+def run_bulk_render(paths, store, workers=None, chunksize=32, label='Rendering', skip_deltas=False):
+    """Render answer files across a process pool, storing each result.
+
+    Rendering runs in the pool; `store(path, result)` runs in this process so
+    writes go through the normal storage path. Returns a list of
+    (path, error) failures.
+    """
+    failures = []
+    render = functools.partial(_render_answers_file, skip_deltas=skip_deltas)
+    with ProcessPoolExecutor(max_workers=workers) as pool, \
+            click.progressbar(length=len(paths), label=label) as bar:
+        for path, result, error in pool.map(render, paths, chunksize=chunksize):
+            if error is None and result is not None:
+                try:
+                    store(path, result)
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+            if error is not None:
+                failures.append((path, error))
+            bar.update(1)
+    return failures
+
+def _report_failures(failures, total):
+    """Print a bulk run summary and exit non-zero if anything failed"""
+    click.echo(f"{total - len(failures)}/{total} succeeded")
+    for path, error in failures:
+        click.echo(f"  FAILED {path}: {error}", err=True)
+    if failures:
+        sys.exit(1)
+
+def _collect_json_files(paths):
+    """Expand files and directories into a sorted list of .json files"""
+    files = []
+    for p in map(Path, paths):
+        files.extend(sorted(p.glob('*.json')) if p.is_dir() else [p])
+    return [str(f) for f in files]
+
+@bp.cli.command('import-prds')
+@click.argument('paths', nargs=-1, required=True, type=click.Path(exists=True))
+@click.option('--workers', type=int, help='Worker processes (default: all cores).')
+@click.option('--chunksize', type=int, default=32, show_default=True)
+def import_prds_command(paths, workers, chunksize):
+    """Import answer files collected offline and render their PRDs"""
+    files = _collect_json_files(paths)
+    
+    def store(path, result):
+        sid, _ = store_prd(result['markdown'], result['answers'], result['timestamp'])
+        try:
+            update_stats(result['answers'], result['timestamp'])
+        except Exception as e:
+            # Importing the file again would duplicate it; `rebuild-stats` fixes the counts
+            raise RuntimeError(f"imported as {sid}, but updating stats failed: {e}") from e
+    
+    _report_failures(run_bulk_render(files, store, workers, chunksize, 'Importing'), len(files))
+
+@bp.cli.command('rerender-prds')
+@click.option('--workers', type=int, help='Worker processes (default: all cores).')
+@click.option('--chunksize', type=int, default=32, show_default=True)
+def rerender_prds_command(workers, chunksize):
+    """Re-render every archived PRD from its answers with the current questions"""
+    files = [str(p) for p in list_answer_files()]
+    
+    def store(path, result):
+        store_prd(
+            result['markdown'], result['answers'], result['timestamp'],
+            sid=submission_id(Path(path)), lineage=result['lineage']
+        )
+    
+    # Archived deltas render from their parent on read, so there is nothing to redo
+    failures = run_bulk_render(files, store, workers, chunksize, 'Re-rendering', skip_deltas=True)
+    _report_failures(failures, len(files))
+
+# ---------------------------------------------------------------------------
+# Analytics aggregates
+# ---------------------------------------------------------------------------
+
+STATS_DB = STATE_DIR / 'stats.db'
+STATS_ACCURACY = 0.02
+
+class QuantileSketch:
+    """Log-bucketed streaming quantile sketch (DDSketch-style).
+
+    Values are counted in buckets whose bounds grow geometrically, so any
+    quantile is answered within `accuracy` relative error using a handful of
+    counters instead of every observed value.
+    """
+
+    def __init__(self, accuracy=STATS_ACCURACY, buckets=None, zeros=0):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.buckets = buckets or {}
+        self.zeros = zeros
+
+    @property
+    def count(self):
+        return self.zeros + sum(self.buckets.values())
+
+    def bucket_key(self, value):
+        """Return the bucket a value falls in, or None for the zero bucket"""
+        if value <= 0:
+            return None
+        return str(math.ceil(math.log(value, self.gamma)))
+
+    def add(self, value):
+        key = self.bucket_key(value)
+        if key is None:
+            self.zeros += 1
+            return
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+
+    def quantile(self, q):
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0
+        for key in sorted(self.buckets, key=int):
+            seen += self.buckets[key]
+            if rank < seen:
+                return 2 * self.gamma ** int(key) / (self.gamma + 1)
+        return None
+
+def _stats_db():
+    conn = sqlite_connect(STATS_DB, timeout=1)
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS counters '
+        '(name TEXT PRIMARY KEY, value INTEGER NOT NULL)'
+    )
+    return conn
+
+def stats_increments(answers, timestamp):
+    """Return the counter deltas one submission contributes.
+
+    Counters are named `submissions`, `day:<date>`, `answered:<index>`,
+    `skipped:<index>` and `length:<section>:<bucket>`; `version` moves on
+    every change so readers can cache the summary.
+    """
+    try:
+        day = parse_timestamp(timestamp).date().isoformat()
+    except (TypeError, ValueError):
+        day = datetime.now(timezone.utc).date().isoformat()
+    
+    deltas = collections.Counter({'submissions': 1, 'version': 1, f"day:{day}": 1})
+    sketch = QuantileSketch()
+    for index, q in enumerate(QUESTIONS):
+        answer = answers.get(str(index))
+        # Mirror the renderer: anything falsy becomes "(No answer provided)"
+        if not answer:
+            deltas[f"skipped:{index}"] += 1
+            continue
+        deltas[f"answered:{index}"] += 1
+        bucket = sketch.bucket_key(len(str(answer)))
+        deltas[f"length:{q['section']}:{'zero' if bucket is None else bucket}"] += 1
+    return deltas
+
+def update_stats(answers, timestamp):
+    """Incrementally fold a new submission into the shared aggregates.
+
+    Each counter is an UPSERT in one short SQLite transaction, so saves in
+    different workers only contend for that commit, never for the whole
+    aggregate document.
+    """
+    conn = _stats_db()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        conn.executemany(
+            'INSERT INTO counters (name, value) VALUES (?, ?) '
+            'ON CONFLICT (name) DO UPDATE SET value = value + excluded.value',
+            stats_increments(answers, timestamp).items()
+        )
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+
+def _stats_version(conn):
+    row = conn.execute("SELECT value FROM counters WHERE name = 'version'").fetchone()
+    return row[0] if row else 0
+
+def _load_stats(conn):
+    """Reassemble the counters into submissions, per-question, per-day and sketch totals"""
+    stats = {
+        'submissions': 0,
+        'answered': [0] * len(QUESTIONS),
+        'skipped': [0] * len(QUESTIONS),
+        'answer_length': {},
+        'per_day': {}
+    }
+    for name, value in conn.execute('SELECT name, value FROM counters ORDER BY name'):
+        kind, _, rest = name.partition(':')
+        if kind == 'submissions':
+            stats['submissions'] = value
+        elif kind in ('answered', 'skipped'):
+            # Counters for questions that have since been removed are ignored
+            if int(rest) < len(QUESTIONS):
+                stats[kind][int(rest)] = value
+        elif kind == 'day':
+            stats['per_day'][rest] = value
+        elif kind == 'length':
+            section, _, bucket = rest.rpartition(':')
+            sketch = stats['answer_length'].setdefault(section, QuantileSketch())
+            if bucket == 'zero':
+                sketch.zeros = value
+            else:
+                sketch.buckets[bucket] = value
+    return stats
+
+# (version, view) swapped as one tuple so concurrent threads never see a torn pair
+_stats_view_cache = (None, None)
+
+def stats_view():
+    """Summarize the aggregates for /api/stats, cached until a counter changes"""
+    global _stats_view_cache
+    conn = _stats_db()
+    version = _stats_version(conn)
+    cached_version, cached_view = _stats_view_cache
+    if cached_view is not None and cached_version == version:
+        return cached_view
+    
+    conn.execute('BEGIN')
+    try:
+        version = _stats_version(conn)
+        stats = _load_stats(conn)
+    finally:
+        conn.execute('COMMIT')
+    total = stats['submissions']
+    questions = [
+        {
+            'index': index,
+            'number': q['number'],
+            'text': q['text'],
+            'section': q['section'],
+            'answered': stats['answered'][index],
+            'skipped': stats['skipped'][index],
+            'completion_rate': stats['answered'][index] / total if total else None
+        }
+        for index, q in enumerate(QUESTIONS)
+    ]
+    sections = {}
+    for section, sketch in stats['answer_length'].items():
+        sections[section] = {
+            'answers': sketch.count,
+            'median_answer_length': round(sketch.quantile(0.5)),
+            'p90_answer_length': round(sketch.quantile(0.9))
+        }
+    view = {
+        'submissions': total,
+        'questions': questions,
+        'most_skipped': sorted(
+            (q for q in questions if q['skipped']), key=lambda q: q['skipped'], reverse=True
+        )[:10],
+        'sections': sections,
+        'submissions_per_day': stats['per_day']
+    }
+    _stats_view_cache = (version, view)
+    return view
+
+@bp.route('/api/stats', methods=['GET'])
+def api_stats():
+    """Serve precomputed submission analytics"""
+    return jsonify(stats_view())
+
+@bp.cli.command('rebuild-stats')
+def rebuild_stats_command():
+    """Recompute the analytics aggregates from the whole archive"""
+    totals = collections.Counter()
+    seen = set()
+    for sid, record in iter_submissions():
+        seen.add(sid)
+        totals.update(stats_increments(record.get('answers', {}), record.get('timestamp')))
+    conn = _stats_db()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        # Fold in PRDs saved while the archive was being scanned; their own
+        # updates went to the counters this is about to replace
+        for _, sid in iter_submission_ids():
+            if sid in seen:
+                continue
+            try:
+                record = load_submission(sid)
+            except (OSError, ValueError, KeyError):
+                continue
+            totals.update(stats_increments(record['answers'], record['timestamp']))
+        totals['version'] = _stats_version(conn) + 1
+        conn.execute('DELETE FROM counters')
+        conn.executemany('INSERT INTO counters (name, value) VALUES (?, ?)', totals.items())
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    click.echo(f"Rebuilt stats from {totals['submissions']} submissions")
+
+# ---------------------------------------------------------------------------
+# Draft sessions
+# ---------------------------------------------------------------------------
+
+# Drafts live in a SQLite database shared by every worker. By default it sits
+# on tmpfs (/dev/shm) so active drafts are served from memory, and it is
+# periodically snapshotted to STATE_DIR so a reboot loses at most one interval.
+_SHM_DIR = Path('/dev/shm')
+DRAFT_DB = Path(os.environ.get(
+    'RPG_DRAFT_DB',
+    _SHM_DIR / f"rpg_drafts_{hashlib.sha1(str(STATE_DIR.resolve()).encode()).hexdigest()[:12]}.db"
+    if _SHM_DIR.is_dir() else STATE_DIR / 'drafts.db'
+))
+DRAFT_SNAPSHOT_PATH = STATE_DIR / 'drafts.snapshot.db'
+DRAFT_LOCK_PATH = STATE_DIR / 'drafts.lock'
+DRAFT_TTL = int(os.environ.get('RPG_DRAFT_TTL', 24 * 3600))
+DRAFT_MAX_ENTRIES = int(os.environ.get('RPG_DRAFT_MAX_ENTRIES', 10000))
+DRAFT_MAX_BYTES = int(os.environ.get('RPG_DRAFT_MAX_BYTES', 256 * 1024 * 1024))
+DRAFT_SNAPSHOT_INTERVAL = int(os.environ.get('RPG_DRAFT_SNAPSHOT_INTERVAL', 60))
+TRANSCRIPT_MAX_SEGMENTS = 50
+TRANSCRIPT_MAX_PENDING = 64
+DRAFT_ID_CHARS = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_')
+
+_draft_init_lock = threading.Lock()
+_draft_ready_pid = None
+
+def _init_draft_db():
+    """Create the draft tables, restoring the last snapshot if tmpfs was wiped"""
+    global _draft_ready_pid
+    with _draft_init_lock:
+        if _draft_ready_pid == os.getpid():
+            return
+        with open(DRAFT_LOCK_PATH, 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if not DRAFT_DB.exists() and DRAFT_SNAPSHOT_PATH.exists():
+                source = sqlite3.connect(DRAFT_SNAPSHOT_PATH)
+                target = sqlite3.connect(DRAFT_DB)
+                source.backup(target)
+                target.close()
+                source.close()
+            conn = sqlite_connect(DRAFT_DB, timeout=5)
+            conn.executescript(
+                'CREATE TABLE IF NOT EXISTS drafts ('
+                ' session_id TEXT PRIMARY KEY, answers TEXT NOT NULL,'
+                ' current_question INTEGER NOT NULL DEFAULT 0,'
+                ' updated REAL NOT NULL, accessed REAL NOT NULL,'
+                ' size INTEGER NOT NULL DEFAULT 0);'
+                'CREATE INDEX IF NOT EXISTS drafts_accessed ON drafts (accessed);'
+                'CREATE TABLE IF NOT EXISTS draft_meta (key TEXT PRIMARY KEY, value REAL NOT NULL);'
+                'CREATE TABLE IF NOT EXISTS draft_transcripts ('
+                ' session_id TEXT NOT NULL, question INTEGER NOT NULL,'
+                ' next_seq INTEGER NOT NULL, pending TEXT NOT NULL,'
+                ' PRIMARY KEY (session_id, question));'
+            )
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(drafts)')]
+            if 'size' not in columns:
+                # Drafts restored from a snapshot that predates the byte budget
+                conn.execute('ALTER TABLE drafts ADD COLUMN size INTEGER NOT NULL DEFAULT 0')
+                conn.execute('UPDATE drafts SET size = LENGTH(CAST(answers AS BLOB))')
+        _draft_ready_pid = os.getpid()
+        _start_draft_maintenance()
+
+def _start_draft_maintenance():
+    """Start this process's background thread for eviction and snapshots"""
+    def run():
+        while True:
+            time.sleep(max(DRAFT_SNAPSHOT_INTERVAL, 1))
+            try:
+                maintain_drafts()
+            except Exception:
+                logging.getLogger('rpg.drafts').exception('Draft maintenance failed')
+    
+    threading.Thread(target=run, name='rpg-draft-maintenance', daemon=True).start()
+
+def _draft_db():
+    _init_draft_db()
+    return sqlite_connect(DRAFT_DB, timeout=5)
+
+def evict_drafts(conn, now):
+    """Drop drafts idle past the TTL, then the least recently used over the caps"""
+    conn.execute('DELETE FROM drafts WHERE accessed < ?', (now - DRAFT_TTL,))
+    conn.execute(
+        'DELETE FROM drafts WHERE session_id IN ('
+        ' SELECT session_id FROM drafts ORDER BY accessed DESC LIMIT -1 OFFSET ?)',
+        (DRAFT_MAX_ENTRIES,)
+    )
+    conn.execute(
+        'DELETE FROM drafts WHERE session_id IN ('
+        ' SELECT session_id FROM ('
+        '  SELECT session_id, SUM(size) OVER (ORDER BY accessed DESC, session_id) AS total'
+        '  FROM drafts)'
+        ' WHERE total > ?)',
+        (DRAFT_MAX_BYTES,)
+    )
+    conn.execute(
+        'DELETE FROM draft_transcripts WHERE session_id NOT IN (SELECT session_id FROM drafts)'
+    )
+
+def _draft_size(conn, session_id, payload):
+    """Bytes a draft holds: its answers plus any buffered transcript segments"""
+    pending = conn.execute(
+        'SELECT COALESCE(SUM(LENGTH(CAST(pending AS BLOB))), 0) FROM draft_transcripts'
+        ' WHERE session_id = ?',
+        (session_id,)
+    ).fetchone()[0]
+    return len(payload.encode('utf-8')) + pending
+
+def _enforce_draft_budget(conn, now):
+    """Evict immediately, rather than at the next maintenance, once over the byte budget"""
+    total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM drafts').fetchone()[0]
+    if total > DRAFT_MAX_BYTES:
+        evict_drafts(conn, now)
+
+def snapshot_drafts(conn):
+    """Copy the live draft database to disk atomically"""
+    tmp_path = DRAFT_SNAPSHOT_PATH.with_suffix(f".{os.getpid()}.tmp")
+    target = sqlite3.connect(tmp_path)
+    try:
+        conn.backup(target)
+    finally:
+        target.close()
+    os.replace(tmp_path, DRAFT_SNAPSHOT_PATH)
+
+def maintain_drafts(force=False):
+    """Evict and snapshot at most once per interval across all workers.
+
+    Runs on each worker's maintenance thread and from `snapshot-drafts`, never
+    inside a request.
+    """
+    conn = _draft_db()
+    now = time.time()
+    
+    def due():
+        row = conn.execute("SELECT value FROM draft_meta WHERE key = 'maintained'").fetchone()
+        return force or row is None or now - row[0] >= DRAFT_SNAPSHOT_INTERVAL
+    
+    # Plain read first; only the worker that finds it due takes the write lock
+    if not due():
+        return False
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        if not due():
+            conn.execute('ROLLBACK')
+            return False
+        evict_drafts(conn, now)
+        conn.execute(
+            "INSERT OR REPLACE INTO draft_meta (key, value) VALUES ('maintained', ?)", (now,)
+        )
+        conn.execute('COMMIT')
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        raise
+    snapshot_drafts(conn)
+    return True
+
+def load_draft(session_id):
+    """Return a live draft (touching its LRU position) or None"""
+    conn = _draft_db()
+    now = time.time()
+    row = conn.execute(
+        'SELECT answers, current_question, updated FROM drafts WHERE session_id = ? AND accessed >= ?',
+        (session_id, now - DRAFT_TTL)
+    ).fetchone()
+    if row is None:
+        return None
+    conn.execute('UPDATE drafts SET accessed = ? WHERE session_id = ?', (now, session_id))
+    transcript_seq = conn.execute(
+        'SELECT question, next_seq FROM draft_transcripts WHERE session_id = ?', (session_id,)
+    )
+    return {
+        'session_id': session_id,
+        'answers': json.loads(row[0]),
+        'current_question': row[1],
+        'updated': row[2],
+        'transcript_seq': {str(question): seq for question, seq in transcript_seq}
+    }
+
+def save_draft(session_id, answers, current_question, create=False, transcript_seq=None):
+    """Store a draft; returns False if it does not exist and `create` is False.
+
+    `transcript_seq` maps question indexes to the next voice segment the client
+    will send. The answers already include every earlier segment, so those
+    questions restart at that sequence with nothing buffered.
+    """
+    conn = _draft_db()
+    now = time.time()
+    payload = json.dumps(answers, ensure_ascii=False)
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        if not create and conn.execute(
+            'SELECT 1 FROM drafts WHERE session_id = ? AND accessed >= ?',
+            (session_id, now - DRAFT_TTL)
+        ).fetchone() is None:
+            conn.execute('ROLLBACK')
+            return False
+        conn.executemany(
+            'INSERT OR REPLACE INTO draft_transcripts (session_id, question, next_seq, pending)'
+            " VALUES (?, ?, ?, '{}')",
+            [(session_id, int(q), n) for q, n in (transcript_seq or {}).items()]
+        )
+        size = _draft_size(conn, session_id, payload)
+        if create:
+            conn.execute(
+                'INSERT INTO drafts (session_id, answers, current_question, updated, accessed, size)'
+                ' VALUES (?, ?, ?, ?, ?, ?)',
+                (session_id, payload, current_question, now, now, size)
+            )
+        else:
+            conn.execute(
+                'UPDATE drafts SET answers = ?, current_question = ?, updated = ?, accessed = ?, size = ?'
+                ' WHERE session_id = ?',
+                (payload, current_question, now, now, size, session_id)
+            )
+        _enforce_draft_budget(conn, now)
+        conn.execute('COMMIT')
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        raise
+    return True
+
+def delete_draft(session_id):
+    conn = _draft_db()
+    conn.execute('DELETE FROM drafts WHERE session_id = ?', (session_id,))
+    conn.execute('DELETE FROM draft_transcripts WHERE session_id = ?', (session_id,))
+
+class TranscriptGap(Exception):
+    """A segment arrived too far ahead of the next expected sequence number"""
+
+    def __init__(self, question, next_seq):
+        super().__init__(f"question {question} expects seq {next_seq}")
+        self.question = question
+        self.next_seq = next_seq
+
+def append_transcript(session_id, segments):
+    """Coalesce finalized speech segments into a draft's answers.
+
+    Each question's segments are appended strictly in `seq` order: early
+    arrivals wait in a small pending buffer and replays of already-applied or
+    already-buffered sequence numbers are ignored. Returns None if the draft
+    does not exist, else {'accepted', 'duplicates', 'next_seq'}.
+    """
+    conn = _draft_db()
+    now = time.time()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        row = conn.execute(
+            'SELECT answers FROM drafts WHERE session_id = ? AND accessed >= ?',
+            (session_id, now - DRAFT_TTL)
+        ).fetchone()
+        if row is None:
+            conn.execute('ROLLBACK')
+            return None
+        answers = json.loads(row[0])
+        
+        states = {}
+        accepted = duplicates = 0
+        for segment in segments:
+            question = segment['question']
+            if question not in states:
+                state = conn.execute(
+                    'SELECT next_seq, pending FROM draft_transcripts WHERE session_id = ? AND question = ?',
+                    (session_id, question)
+                ).fetchone()
+                states[question] = [state[0], json.loads(state[1])] if state else [0, {}]
+            next_seq, pending = states[question]
+            seq = segment['seq']
+            if seq < next_seq or str(seq) in pending:
+                duplicates += 1
+                continue
+            if seq - next_seq > TRANSCRIPT_MAX_PENDING:
+                raise TranscriptGap(question, next_seq)
+            pending[str(seq)] = segment['text']
+            accepted += 1
+            
+            # Apply everything that is now contiguous
+            key = str(question)
+            while str(next_seq) in pending:
+                answers[key] = answers.get(key, '') + pending.pop(str(next_seq))
+                next_seq += 1
+            if len(answers.get(key, '')) > MAX_ANSWER_CHARS:
+                raise ValueError(f"answers[{key}] exceeds {MAX_ANSWER_CHARS} characters")
+            states[question][0] = next_seq
+        
+        conn.executemany(
+            'INSERT OR REPLACE INTO draft_transcripts (session_id, question, next_seq, pending)'
+            ' VALUES (?, ?, ?, ?)',
+            [(session_id, q, n, json.dumps(p)) for q, (n, p) in states.items()]
+        )
+        payload = json.dumps(answers, ensure_ascii=False)
+        conn.execute(
+            'UPDATE drafts SET answers = ?, updated = ?, accessed = ?, size = ? WHERE session_id = ?',
+            (payload, now, now, _draft_size(conn, session_id, payload), session_id)
+        )
+        _enforce_draft_budget(conn, now)
+        conn.execute('COMMIT')
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        raise
+    return {
+        'accepted': accepted,
+        'duplicates': duplicates,
+        'next_seq': {str(q): n for q, (n, _) in states.items()}
+    }
+
+def _transcript_segments():
+    """Parse and validate a transcript body, returning (segments, error)"""
+    data = request.get_json(silent=True)
+    segments = data.get('segments') if isinstance(data, dict) else None
+    if not isinstance(segments, list) or not 0 < len(segments) <= TRANSCRIPT_MAX_SEGMENTS:
+        return None, f"segments must be a list of 1-{TRANSCRIPT_MAX_SEGMENTS} items"
+    for segment in segments:
+        if not isinstance(segment, dict):
+            return None, 'each segment must be an object'
+        question, seq, text = segment.get('question'), segment.get('seq'), segment.get('text')
+        # type() rather than isinstance(): JSON true/false would pass as ints
+        if type(question) is not int or not 0 <= question < len(QUESTIONS):
+            return None, 'segment question must be a question index'
+        if type(seq) is not int or seq < 0:
+            return None, 'segment seq must be a non-negative integer'
+        if not isinstance(text, str) or len(text) > MAX_ANSWER_CHARS:
+            return None, f"segment text must be a string of at most {MAX_ANSWER_CHARS} characters"
+    return segments, None
+
+def _valid_session_id(session_id):
+    return 16 <= len(session_id) <= 64 and set(session_id) <= DRAFT_ID_CHARS
+
+def _draft_body():
+    """Parse and validate a draft body, returning (answers, current_question, transcript_seq, error)"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return None, None, None, 'Request body must be a JSON object'
+    answers = data.get('answers', {})
+    error = validate_answers(answers)
+    if error:
+        return None, None, None, error
+    current_question = data.get('current_question', 0)
+    if not isinstance(current_question, int) or not 0 <= current_question < len(QUESTIONS):
+        return None, None, None, 'current_question must be a question index'
+    transcript_seq = data.get('transcript_seq', {})
+    if not isinstance(transcript_seq, dict) or not all(
+        QUESTION_KEY.fullmatch(key) and int(key) < len(QUESTIONS)
+        and type(seq) is int and seq >= 0
+        for key, seq in transcript_seq.items()
+    ):
+        return None, None, None, 'transcript_seq must map question indexes to sequence numbers'
+    return answers, current_question, transcript_seq, None
+
+@bp.route('/api/drafts', methods=['POST'])
+@rate_limited('draft')
+def create_draft():
+    """Start a server-side draft session"""
+    answers, current_question, transcript_seq, error = _draft_body()
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+    session_id = secrets.token_urlsafe(18)
+    save_draft(session_id, answers, current_question, create=True, transcript_seq=transcript_seq)
+    return jsonify({'success': True, 'session_id': session_id}), 201
+
+@bp.route('/api/drafts/<session_id>', methods=['GET'])
+def get_draft(session_id):
+    """Fetch a draft so a session can continue on another device"""
+    draft = load_draft(session_id) if _valid_session_id(session_id) else None
+    if draft is None:
+        return jsonify({'success': False, 'error': 'Draft not found'}), 404
+    return jsonify({'success': True, **draft})
+
+@bp.route('/api/drafts/<session_id>', methods=['PUT'])
+@rate_limited('draft')
+def update_draft(session_id):
+    """Replace a draft's answers"""
+    answers, current_question, transcript_seq, error = _draft_body()
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+    if not _valid_session_id(session_id) or not save_draft(
+        session_id, answers, current_question, transcript_seq=transcript_seq
+    ):
+        return jsonify({'success': False, 'error': 'Draft not found'}), 404
+    return jsonify({'success': True})
+
+@bp.route('/api/drafts/<session_id>', methods=['DELETE'])
+def remove_draft(session_id):
+    """Discard a draft"""
+    if _valid_session_id(session_id):
+        delete_draft(session_id)
+    return jsonify({'success': True})
+
+@bp.route('/api/drafts/<session_id>/transcript', methods=['POST'])
+@rate_limited('draft')
+def ingest_transcript(session_id):
+    """Append finalized voice segments to a draft, in order and exactly once"""
+    segments, error = _transcript_segments()
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+    try:
+        result = append_transcript(session_id, segments) if _valid_session_id(session_id) else None
+    except TranscriptGap as gap:
+        return jsonify({
+            'success': False,
+            'error': str(gap),
+            'next_seq': {str(gap.question): gap.next_seq}
+        }), 409
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if result is None:
+        return jsonify({'success': False, 'error': 'Draft not found'}), 404
+    return jsonify({'success': True, **result})
+
+@bp.cli.command('snapshot-drafts')
+def snapshot_drafts_command():
+    """Evict expired drafts and snapshot the draft store to disk now"""
+    maintain_drafts(force=True)
+    click.echo(f"Snapshot written to {DRAFT_SNAPSHOT_PATH}")
+
+# ---------------------------------------------------------------------------
+# Revision history
+# ---------------------------------------------------------------------------
+
+# Every Nth revision in a lineage stores its full answers so reconstruction
+# never walks more than N-1 deltas
+REVISION_SNAPSHOT_EVERY = int(os.environ.get('RPG_REVISION_SNAPSHOT_EVERY', 10))
+SUBMISSION_ID_CHARS = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-')
+
+def valid_submission_id(sid):
+    """Accept ULIDs and legacy timestamp ids, nothing that could escape PRD_DIR"""
+    return 0 < len(sid) <= 64 and set(sid) <= SUBMISSION_ID_CHARS
+
+def read_submission_record(sid):
+    """Return the raw stored record for an id, raising KeyError if absent"""
+    if not valid_submission_id(sid):
+        raise KeyError(sid)
+    try:
+        with open(PRD_DIR / f"answers_{sid}.json", 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        # Cold PRDs live in packed segments
+        return read_packed_record(sid)
+
+def answer_delta(old, new):
+    """Per-question changes turning `old` answers into `new`"""
+    return {
+        'set': {k: v for k, v in new.items() if old.get(k) != v},
+        'unset': sorted(k for k in old if k not in new)
+    }
+
+def apply_delta(answers, delta):
+    answers = dict(answers)
+    answers.update(delta.get('set', {}))
+    for key in delta.get('unset', []):
+        answers.pop(key, None)
+    return answers
+
+def load_submission(sid):
+    """Return a submission with its full answers, reconstructing delta revisions.
+
+    Raises KeyError if the id (or an ancestor a delta depends on) is missing.
+    """
+    record = ancestor = read_submission_record(sid)
+    chain = []
+    while 'answers' not in ancestor:
+        chain.append(ancestor['delta'])
+        ancestor = read_submission_record(ancestor['parent'])
+    answers = ancestor['answers']
+    for delta in reversed(chain):
+        answers = apply_delta(answers, delta)
+    
+    return {
+        'id': sid,
+        'timestamp': record.get('timestamp'),
+        'answers': answers,
+        'markdown_file': record.get('markdown_file'),
+        'parent': record.get('parent'),
+        'depth': record.get('depth', 0)
+    }
+
+def store_revision(markdown, answers, timestamp, parent):
+    """Store a revision of `parent`, as a delta unless a snapshot is due"""
+    with trace_span('delta'):
+        base = load_submission(parent)
+        depth = base['depth'] + 1
+        lineage = {'parent': parent, 'depth': depth}
+        if not depth % REVISION_SNAPSHOT_EVERY:
+            return store_prd(markdown, answers, timestamp, lineage=lineage)
+        lineage['delta'] = answer_delta(base['answers'], answers)
+    sid, filename = store_prd(None, answers, timestamp, lineage=lineage)
+    if not _parent_survives(parent):
+        # Expired by compaction while this was being saved: keep the full answers instead
+        del lineage['delta']
+        return store_prd(markdown, answers, timestamp, sid=sid, lineage=lineage)
+    return sid, filename
+
+def _parent_survives(parent):
+    """Check that a delta's parent is still stored, serialized with expire_packed()"""
+    conn = _segment_db()
+    if conn is None:
+        # Nothing was ever packed, so nothing can have expired
+        return True
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        read_submission_record(parent)
+        return True
+    except KeyError:
+        return False
+    finally:
+        conn.execute('COMMIT')
+
+def submission_markdown(sid, submission):
+    """Return a submission's stored markdown, rendering it if there is none"""
+    if submission.get('markdown_file'):
+        try:
+            return (PRD_DIR / submission['markdown_file']).read_text(encoding='utf-8')
+        except FileNotFoundError:
+            pass
+        try:
+            # Packed PRDs keep their markdown in the segment
+            return read_packed_markdown(sid)
+        except KeyError:
+            pass
+    return render_prd_markdown(submission.get('answers', {}), submission.get('timestamp'))
+
+@bp.route('/api/prds/<sid>', methods=['GET'])
+def get_prd(sid):
+    """Fetch a stored PRD with its full answers"""
+    try:
+        submission = load_submission(sid)
+    except KeyError:
+        return jsonify({'success': False, 'error': 'PRD not found'}), 404
+    return jsonify({'success': True, **submission, 'markdown': submission_markdown(sid, submission)})
+
+def _history_order(key):
+    """Sort question indexes numerically, then any other keys by name"""
+    if QUESTION_KEY.fullmatch(key) and int(key) < len(QUESTIONS):
+        return 0, int(key), ''
+    return 1, 0, key
+
+@bp.route('/api/prds/<sid>/history', methods=['GET'])
+def prd_history(sid):
+    """List a PRD's lineage, oldest first, with per-question diffs"""
+    try:
+        versions = [load_submission(sid)]
+        while versions[-1]['parent']:
+            versions.append(load_submission(versions[-1]['parent']))
+    except KeyError:
+        return jsonify({'success': False, 'error': 'PRD not found'}), 404
+    versions.reverse()
+    
+    history = []
+    previous = {}
+    for version in versions:
+        delta = answer_delta(previous, version['answers'])
+        changes = []
+        for key in sorted(set(delta['set']) | set(delta['unset']), key=_history_order):
+            change = {'before': previous.get(key), 'after': version['answers'].get(key)}
+            if _history_order(key)[0] == 0:
+                q = QUESTIONS[int(key)]
+                change.update(question=int(key), number=q['number'], text=q['text'])
+            else:
+                # Legacy records can hold keys that no longer name a question
+                change.update(question=None, key=key)
+            changes.append(change)
+        history.append({
+            'id': version['id'],
+            'timestamp': version['timestamp'],
+            'parent': version['parent'],
+            'changes': changes
+        })
+        previous = version['answers']
+    
+    return jsonify({'success': True, 'id': sid, 'history': history})
+
+# ---------------------------------------------------------------------------
+# Packed segments
+# ---------------------------------------------------------------------------
+
+# Cold PRDs are moved out of loose files into append-only segment files of
+# JSON lines, located through an offset index. Each line keeps the stored
+# record and the exact markdown document saved with it.
+SEGMENT_DIR = PRD_DIR / 'segments'
+SEGMENT_INDEX_PATH = SEGMENT_DIR / 'index.db'
+SEGMENT_MAX_BYTES = int(os.environ.get('RPG_SEGMENT_MAX_BYTES', 64 * 1024 * 1024))
+COMPACTION_LOCK_PATH = STATE_DIR / 'compaction.lock'
+COMPACTION_BATCH = 500
+
+def _segment_db(create=False):
+    """Return the segment index connection, or None if nothing was ever packed"""
+    if not create and not SEGMENT_INDEX_PATH.exists():
+        return None
+    if not create:
+        # The packer created the schema; executescript() would also commit any open transaction
+        return sqlite_connect(SEGMENT_INDEX_PATH, timeout=5)
+    SEGMENT_DIR.mkdir(exist_ok=True)
+    conn = sqlite_connect(SEGMENT_INDEX_PATH, timeout=5)
+    conn.executescript(
+        'CREATE TABLE IF NOT EXISTS packed ('
+        ' id TEXT PRIMARY KEY, ordinal TEXT NOT NULL, segment TEXT NOT NULL,'
+        ' offset INTEGER NOT NULL, length INTEGER NOT NULL,'
+        ' created REAL NOT NULL, parent TEXT);'
+        'CREATE INDEX IF NOT EXISTS packed_ordinal ON packed (ordinal);'
+        'CREATE INDEX IF NOT EXISTS packed_created ON packed (created);'
+        'CREATE TABLE IF NOT EXISTS segment_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);'
+    )
+    return conn
+
+def _ordinal(sid):
+    legacy, key = submission_sort_key(sid)
+    return f"{legacy}:{key}"
+
+def read_packed_record(sid):
+    """Return a packed submission's stored record, raising KeyError if absent"""
+    return _read_packed_entry(sid)['record']
+
+def read_packed_markdown(sid):
+    """Return a packed submission's stored markdown, raising KeyError if it has none"""
+    markdown = _read_packed_entry(sid).get('markdown')
+    if markdown is None:
+        raise KeyError(sid)
+    return markdown
+
+def _read_packed_entry(sid):
+    conn = _segment_db()
+    previous = None
+    while True:
+        row = conn.execute(
+            'SELECT segment, offset, length FROM packed WHERE id = ?', (sid,)
+        ).fetchone() if conn else None
+        if row is None or row == previous:
+            raise KeyError(sid)
+        segment, offset, length = row
+        try:
+            with open(SEGMENT_DIR / segment, 'rb') as f:
+                f.seek(offset)
+                return json.loads(f.read(length))
+        except FileNotFoundError:
+            # Expired, or its segment was rewritten, since the lookup: look again
+            previous = row
+
+def iter_packed_ids(cursor=None):
+    """Yield (sort key, id) for packed submissions in submission order"""
+    conn = _segment_db()
+    if conn is None:
+        return
+    rows = conn.execute(
+        'SELECT id FROM packed WHERE ordinal > ? ORDER BY ordinal',
+        (_ordinal(cursor) if cursor else '',)
+    )
+    for (sid,) in rows:
+        yield submission_sort_key(sid), sid
+
+def packed_count():
+    conn = _segment_db()
+    row = conn.execute("SELECT value FROM segment_meta WHERE key = 'count'").fetchone() if conn else None
+    return row[0] if row else 0
+
+def _update_packed_count(conn):
+    conn.execute(
+        "INSERT OR REPLACE INTO segment_meta (key, value) VALUES ('count', (SELECT COUNT(*) FROM packed))"
+    )
+
+def _open_segment():
+    """Open the newest segment for appending, starting a new one when full"""
+    segments = sorted(SEGMENT_DIR.glob('seg-*.dat'))
+    if segments and segments[-1].stat().st_size < SEGMENT_MAX_BYTES:
+        path = segments[-1]
+    else:
+        path = SEGMENT_DIR / f"seg-{new_submission_id()}.dat"
+    return open(path, 'ab')
+
+def pack_cold_files(cutoff):
+    """Move loose PRDs last modified before `cutoff` into segments.
+
+    Records are appended and fsynced, then indexed, and only then are the
+    loose files removed, so every PRD stays readable throughout; a crash at
+    any point at worst leaves unreferenced bytes in a segment.
+    """
+    conn = _segment_db(create=True)
+    segment = _open_segment()
+    batch = []
+    packed = 0
+    
+    def flush():
+        nonlocal segment
+        segment.flush()
+        os.fsync(segment.fileno())
+        conn.execute('BEGIN IMMEDIATE')
+        conn.executemany(
+            'INSERT OR REPLACE INTO packed (id, ordinal, segment, offset, length, created, parent)'
+            ' VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [row for row, _ in batch]
+        )
+        _update_packed_count(conn)
+        conn.execute('COMMIT')
+        for _, paths in batch:
+            for path in paths:
+                path.unlink(missing_ok=True)
+        batch.clear()
+        if segment.tell() >= SEGMENT_MAX_BYTES:
+            segment.close()
+            segment = _open_segment()
+    
+    try:
+        for path in list_answer_files():
+            try:
+                stat = path.stat()
+                if stat.st_mtime >= cutoff:
+                    continue
+                record = json.loads(path.read_bytes())
+                paths = [path]
+                markdown = None
+                if record.get('markdown_file'):
+                    paths.append(PRD_DIR / record['markdown_file'])
+                    try:
+                        markdown = paths[-1].read_text(encoding='utf-8')
+                    except FileNotFoundError:
+                        pass
+            except (OSError, ValueError):
+                continue
+            sid = submission_id(path)
+            line = json.dumps(
+                {'id': sid, 'record': record, 'markdown': markdown}, ensure_ascii=False
+            ).encode('utf-8') + b'\n'
+            offset = segment.tell()
+            segment.write(line)
+            batch.append((
+                (sid, _ordinal(sid), Path(segment.name).name, offset, len(line),
+                 stat.st_mtime, record.get('parent')),
+                paths
+            ))
+            packed += 1
+            if len(batch) >= COMPACTION_BATCH or segment.tell() >= SEGMENT_MAX_BYTES:
+                flush()
+        if batch:
+            flush()
+    finally:
+        segment.close()
+    return packed
+
+def _rewrite_segment(conn, name):
+    """Copy a segment's indexed records into a new segment and delete the old file.
+
+    The new file is fsynced and the index switched to it before the old file
+    goes, so readers always find each record in one of the two.
+    """
+    rows = conn.execute(
+        'SELECT id, offset, length FROM packed WHERE segment = ? ORDER BY offset', (name,)
+    ).fetchall()
+    new_name = f"seg-{new_submission_id()}.dat"
+    tmp_path = SEGMENT_DIR / f".{new_name}.tmp"
+    moved = []
+    with open(SEGMENT_DIR / name, 'rb') as source, open(tmp_path, 'wb') as target:
+        for sid, offset, length in rows:
+            source.seek(offset)
+            moved.append((new_name, target.tell(), sid))
+            target.write(source.read(length))
+        target.flush()
+        os.fsync(target.fileno())
+    os.replace(tmp_path, SEGMENT_DIR / new_name)
+    conn.execute('BEGIN IMMEDIATE')
+    conn.executemany('UPDATE packed SET segment = ?, offset = ? WHERE id = ?', moved)
+    conn.execute('COMMIT')
+    (SEGMENT_DIR / name).unlink(missing_ok=True)
+
+def expire_packed(cutoff):
+    """Drop packed PRDs created before `cutoff` and remove their bytes from disk.
+
+    Segments left empty are deleted; segments that still hold live records
+    are rewritten without the expired ones. Ancestors of surviving revisions
+    are kept so deltas stay reconstructable.
+    """
+    conn = _segment_db()
+    if conn is None:
+        return 0
+    rows = conn.execute('SELECT id, parent, segment FROM packed WHERE created < ?', (cutoff,)).fetchall()
+    candidates = {sid: parent for sid, parent, _ in rows}
+    segment_of = {sid: segment for sid, _, segment in rows}
+    scanned = set()
+    
+    def keep_ancestors(parents):
+        for parent in parents:
+            while parent in candidates:
+                parent = candidates.pop(parent)
+    
+    def loose_parents():
+        for path in list_answer_files():
+            if path in scanned:
+                continue
+            scanned.add(path)
+            try:
+                yield json.loads(path.read_bytes()).get('parent')
+            except (OSError, ValueError):
+                continue
+    
+    keep_ancestors([p for (p,) in conn.execute(
+        'SELECT parent FROM packed WHERE created >= ? AND parent IS NOT NULL', (cutoff,)
+    )])
+    keep_ancestors(loose_parents())
+    
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        # Revisions saved during the scan. Any later one confirms its parent
+        # under this lock (see store_revision) and sees the deletion.
+        keep_ancestors(loose_parents())
+        conn.executemany('DELETE FROM packed WHERE id = ?', [(sid,) for sid in candidates])
+        _update_packed_count(conn)
+        conn.execute('COMMIT')
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        raise
+    
+    touched = {segment_of[sid] for sid in candidates}
+    live = {name for (name,) in conn.execute('SELECT DISTINCT segment FROM packed')}
+    for path in SEGMENT_DIR.glob('seg-*.dat'):
+        if path.name not in live:
+            path.unlink(missing_ok=True)
+        elif path.name in touched:
+            _rewrite_segment(conn, path.name)
+    return len(candidates)
+
+def compact_archive(older_than, expire_after=None):
+    """Pack cold PRDs and apply retention; returns (packed, expired) or None if busy"""
+    with open(COMPACTION_LOCK_PATH, 'w') as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return None
+        now = time.time()
+        packed = pack_cold_files(now - older_than)
+        expired = expire_packed(now - expire_after) if expire_after is not None else 0
+        return packed, expired
+
+@bp.cli.command('compact-prds')
+@click.option('--older-than-days', type=float, default=30, show_default=True,
+              help='Pack PRDs not modified for this many days.')
+@click.option('--expire-after-days', type=float, help='Delete packed PRDs older than this many days.')
+@click.option('--interval', type=float, help='Keep running, compacting every this many seconds.')
+def compact_prds_command(older_than_days, expire_after_days, interval):
+    """Pack cold PRD artifacts into segment files and apply retention"""
+    expire_after = expire_after_days * 86400 if expire_after_days is not None else None
+    while True:
+        result = compact_archive(older_than_days * 86400, expire_after)
+        if result is None:
+            click.echo('Another compaction is running; skipped')
+        else:
+            click.echo(f"Packed {result[0]} PRDs, expired {result[1]}")
+        if not interval:
+            break
+        time.sleep(interval)
+
+# ---------------------------------------------------------------------------
+# Ansible playbook generation
+# ---------------------------------------------------------------------------
+
+# Answer indices (0-based) of the questions the playbook is built from
+PLAYBOOK_SOURCES = {
+    'one_liner': 0,
+    'hardware': 16,
+    'services': 17,
+    'filesystem': 24,
+    'config': 25,
+    'security': 26,
+    'environment': 28,
+    'bootstrap': 29,
+    'dependencies': 30,
+    'health': 31
+}
+PLAYBOOK_CACHE_SIZE = int(os.environ.get('RPG_PLAYBOOK_CACHE_SIZE', 256))
+
+# Templates are compiled once at import; generation only substitutes
+PLAYBOOK_TEMPLATE = string.Template("""---
+# Ansible playbook skeleton generated by Rapid Prototype Genesis
+# Product: $one_liner
+#
+# Hardware stack:
+$hardware
+#
+# Security posture:
+$security
+#
+# Dependency chain:
+$dependencies
+
+- name: $play_name
+  hosts: all
+  become: true
+
+  vars:
+    $packages
+    $directories
+    $environment
+
+  tasks:
+    - name: Install packages
+      ansible.builtin.apt:
+        name: "{{ packages }}"
+        state: present
+        update_cache: true
+
+    - name: Create directories
+      ansible.builtin.file:
+        path: "{{ item }}"
+        state: directory
+        mode: "0755"
+      loop: "{{ directories }}"
+
+    - name: Set environment variables
+      ansible.builtin.lineinfile:
+        path: /etc/environment
+        regexp: "^{{ item.key }}="
+        line: "{{ item.key }}={{ item.value }}"
+      loop: "{{ app_environment | dict2items }}"
+$config_tasks$bootstrap_tasks
+    - name: Enable and start services
+      ansible.builtin.service:
+        name: "{{ item }}"
+        state: started
+        enabled: true
+      loop: "{{ packages }}"
+$health_tasks""")
+
+CONFIG_TASK_TEMPLATE = string.Template("""
+    - name: $name
+      ansible.builtin.template:
+        src: $src
+        dest: $dest
+        mode: "0644"
+""")
+
+TODO_TASK_TEMPLATE = string.Template("""
+    - name: $name
+      ansible.builtin.debug:
+        msg: $msg
+      tags: [$tag]
+""")
+
+_LIST_MARKER = re.compile(r'^\s*(?:[-*•]|\d+[.)])\s*')
+_PATH = re.compile(r'(?<![\w.])/(?:[\w.-]+/?)+')
+_ENV_NAME = re.compile(r'\b[A-Z][A-Z0-9]*(?:_[A-Z0-9]+)+\b|\b[A-Z]{3,}[A-Z0-9]*\b')
+_PACKAGE_NAME = re.compile(r'^[a-z0-9][a-z0-9.+-]*$')
+_JINJA_OPEN = re.compile(r'\{(?=[{%#])')
+
+def _yaml_str(value):
+    """Quote a scalar for YAML (JSON strings are valid YAML double-quoted scalars)"""
+    return json.dumps(value, ensure_ascii=False)
+
+def _yaml_text(value):
+    """Quote free text for a field Ansible templates (play and task names).
+
+    Breaking up `{{`, `{%` and `{#` keeps answer text from being evaluated as
+    Jinja, e.g. a lookup('pipe', ...) running on the control node.
+    """
+    return _yaml_str(_JINJA_OPEN.sub('{ ', value))
+
+def _yaml_comment(text):
+    lines = [line.strip() for line in (text or '').splitlines() if line.strip()]
+    return '\n'.join(f"#   {line}" for line in lines) or '#   (not specified)'
+
+def _yaml_list(name, items):
+    if not items:
+        return f"{name}: []"
+    return f"{name}:\n" + '\n'.join(f"      - {_yaml_str(item)}" for item in items)
+
+def _answer_lines(text):
+    """Split a free-text answer into list items, dropping bullets and numbering"""
+    return [_LIST_MARKER.sub('', line).strip() for line in (text or '').splitlines() if line.strip()]
+
+def extract_packages(text):
+    """Single-word lines of the Software Services answer are taken as packages"""
+    packages = []
+    for line in _answer_lines(text):
+        word = line.rstrip('?').strip().lower()
+        if _PACKAGE_NAME.match(word) and word not in packages:
+            packages.append(word)
+    return packages
+
+def extract_paths(text):
+    return list(dict.fromkeys(p.rstrip('/.') or '/' for p in _PATH.findall(text or '')))
+
+def build_playbook(answers):
+    """Render a playbook skeleton from an answers map"""
+    a = {key: answers.get(str(index)) or '' for key, index in PLAYBOOK_SOURCES.items()}
+    one_liner = ' '.join(a['one_liner'].split()) or 'Rapid prototype'
+    
+    config_files = [p for p in extract_paths(a['config']) if '.' in Path(p).name]
+    directories = [
+        p for p in extract_paths(a['filesystem']) + extract_paths(a['config'])
+        if '.' not in Path(p).name
+    ]
+    environment = list(dict.fromkeys(_ENV_NAME.findall(a['environment'])))
+    
+    config_tasks = ''.join(
+        CONFIG_TASK_TEMPLATE.substitute(
+            name=_yaml_str(f"Deploy {path}"),
+            src=_yaml_str(f"templates/{Path(path).name}.j2"),
+            dest=_yaml_str(path)
+        )
+        for path in config_files
+    )
+    bootstrap_tasks = ''.join(
+        TODO_TASK_TEMPLATE.substitute(
+            name=_yaml_text(f"Bootstrap step {i}: {step}"),
+            msg=_yaml_str('TODO: implement this bootstrap step'),
+            tag='bootstrap'
+        )
+        for i, step in enumerate(_answer_lines(a['bootstrap']), 1)
+    )
+    health_tasks = ''.join(
+        TODO_TASK_TEMPLATE.substitute(
+            name=_yaml_text(f"Health check: {check}"),
+            msg=_yaml_str('TODO: implement this health check'),
+            tag='health'
+        )
+        for check in _answer_lines(a['health'])
+    )
+    if environment:
+        env_block = 'app_environment:\n' + '\n'.join(
+            f"      {name}: {_yaml_str('CHANGE_ME')}" for name in environment
+        )
+    else:
+        env_block = 'app_environment: {}  # See "Environment Variables" in the PRD'
+    
+    return PLAYBOOK_TEMPLATE.substitute(
+        one_liner=one_liner,
+        hardware=_yaml_comment(a['hardware']),
+        security=_yaml_comment(a['security']),
+        dependencies=_yaml_comment(a['dependencies']),
+        play_name=_yaml_text(f"Provision: {one_liner}"),
+        packages=_yaml_list('packages', extract_packages(a['services'])),
+        directories=_yaml_list('directories', directories),
+        environment=env_block,
+        config_tasks=config_tasks,
+        bootstrap_tasks=bootstrap_tasks,
+        health_tasks=health_tasks
+    )
+
+@functools.lru_cache(maxsize=PLAYBOOK_CACHE_SIZE)
+def _cached_playbook(digest, canonical):
+    return build_playbook(json.loads(canonical))
+
+def generate_playbook(answers):
+    """Return (playbook, answer-set hash), memoized per answer-set hash"""
+    canonical = json.dumps(answers, sort_keys=True, ensure_ascii=False)
+    digest = hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+    return _cached_playbook(digest, canonical), digest
+
+@bp.route('/api/prds/<sid>/playbook.yml', methods=['GET'])
+def prd_playbook(sid):
+    """Download an Ansible playbook skeleton generated from a PRD's answers"""
+    try:
+        submission = load_submission(sid)
+    except KeyError:
+        return jsonify({'success': False, 'error': 'PRD not found'}), 404
+    playbook, digest = generate_playbook(submission['answers'])
+    if request.if_none_match.contains(digest):
+        return '', 304
+    response = make_response(playbook)
+    response.headers['Content-Type'] = 'application/yaml; charset=utf-8'
+    response.headers['Content-Disposition'] = f"attachment; filename=playbook_{sid}.yml"
+    response.set_etag(digest)
+    return response
+
+def _playbook_job(sid):
+    """Pool worker: generate one PRD's playbook, returning (id, playbook, error)"""
+    try:
+        return sid, generate_playbook(load_submission(sid)['answers'])[0], None
+    except Exception as e:
+        return sid, None, f"{type(e).__name__}: {e}"
+
+@bp.cli.command('generate-playbooks')
+@click.argument('ids', nargs=-1)
+@click.option('-o', '--output', 'output_dir', type=click.Path(file_okay=False), default='playbooks',
+              show_default=True)
+@click.option('--workers', type=int, help='Worker processes (default: all cores).')
+@click.option('--chunksize', type=int, default=32, show_default=True)
+def generate_playbooks_command(ids, output_dir, workers, chunksize):
+    """Generate playbooks for the given PRD ids (default: the whole archive)"""
+    ids = list(ids) or [sid for sid, _ in iter_submissions()]
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    failures = []
+    with ProcessPoolExecutor(max_workers=workers) as pool, \
+            click.progressbar(length=len(ids), label='Generating') as bar:
+        for sid, playbook, error in pool.map(_playbook_job, ids, chunksize=chunksize):
+            if error is None:
+                atomic_write(output_dir / f"playbook_{sid}.yml", playbook.encode('utf-8'))
+            else:
+                failures.append((sid, error))
+            bar.update(1)
+    _report_failures(failures, len(ids))
+
+# ---------------------------------------------------------------------------
+# HTML preview
+# ---------------------------------------------------------------------------
+
+# (section name, question indices) in document order
+SECTIONS = []
+for _index, _q in enumerate(QUESTIONS):
+    if not SECTIONS or SECTIONS[-1][0] != _q['section']:
+        SECTIONS.append((_q['section'], []))
+    SECTIONS[-1][1].append(_index)
+
+PREVIEW_CACHE_SIZE = int(os.environ.get('RPG_PREVIEW_CACHE_SIZE', 4096))
+PREVIEW_CACHE_BYTES = int(os.environ.get('RPG_PREVIEW_CACHE_BYTES', 32 * 1024 * 1024))
+
+# Rendered sections keyed by a sha256 of their answers, least recently used
+# first; bounded by entry count and by total HTML size
+_preview_cache = collections.OrderedDict()
+_preview_cache_bytes = 0
+_preview_cache_lock = threading.Lock()
+
+PREVIEW_COMMITMENT_HTML = """<hr>
+<section>
+<h2>The Rapid Prototype Commitment</h2>
+<ul>
+<li><strong>NO additional features</strong> beyond what&#x27;s specified</li>
+<li><strong>NO perfect-seeking</strong> that delays shipping</li>
+<li><strong>NO committees</strong> - one vision, one decision-maker</li>
+<li><strong>YES to opinionated defaults</strong></li>
+<li><strong>YES to surprising delight</strong></li>
+<li><strong>YES to shipping TODAY</strong></li>
+</ul>
+<p><em>&quot;Real artists ship.&quot;</em> - Steve Jobs</p>
+</section>
+"""
+
+PREVIEW_PAGE_TEMPLATE = string.Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>$title</title>
+<style>
+body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif; max-width: 760px; margin: 40px auto; padding: 0 20px; line-height: 1.5; }
+.hint { color: #86868b; font-style: italic; }
+.missing { color: #86868b; }
+</style>
+</head>
+<body>
+$body
+</body>
+</html>""")
+
+def _answer_html(text):
+    """Escape a free-text answer, keeping its paragraphs and line breaks"""
+    if not text:
+        return '<p class="missing">(No answer provided)</p>'
+    paragraphs = [p.strip() for p in str(text).split('\n\n') if p.strip()]
+    return ''.join('<p>' + html.escape(p).replace('\n', '<br>') + '</p>' for p in paragraphs)
+
+def render_section_html(section_index, section_answers):
+    """Render one section; cached on a hash of its answers so edits elsewhere are free"""
+    global _preview_cache_bytes
+    key = hashlib.sha256(json.dumps([section_index, section_answers]).encode('utf-8')).digest()
+    with _preview_cache_lock:
+        cached = _preview_cache.get(key)
+        if cached is not None:
+            _preview_cache.move_to_end(key)
+            return cached
+    
+    rendered = _render_section_html(section_index, section_answers)
+    with _preview_cache_lock:
+        if key not in _preview_cache:
+            _preview_cache[key] = rendered
+            _preview_cache_bytes += len(rendered)
+        while _preview_cache and (
+            len(_preview_cache) > PREVIEW_CACHE_SIZE or _preview_cache_bytes > PREVIEW_CACHE_BYTES
+        ):
+            _, evicted = _preview_cache.popitem(last=False)
+            _preview_cache_bytes -= len(evicted)
+    return rendered
+
+def _render_section_html(section_index, section_answers):
+    name, indices = SECTIONS[section_index]
+    parts = [f"<section>\n<h2>{html.escape(name)}</h2>\n"]
+    for index, answer in zip(indices, section_answers):
+        q = QUESTIONS[index]
+        parts.append(
+            f"<h3>{q['number']}. {html.escape(q['text'])}</h3>\n"
+            f"<p class=\"hint\">{html.escape(q['hint'])}</p>\n"
+            f"<div class=\"answer\">{_answer_html(answer)}</div>\n"
+        )
+    parts.append('</section>\n')
+    return ''.join(parts)
+
+def render_preview_html(answers):
+    """Render the PRD as an HTML fragment, one cached section at a time"""
+    parts = ['<article class="prd-preview">\n<h1>Rapid Prototype Genesis - Product Requirements Document</h1>\n']
+    for section_index, (_, indices) in enumerate(SECTIONS):
+        section_answers = tuple(answers.get(str(i)) or None for i in indices)
+        parts.append(render_section_html(section_index, section_answers))
+    parts.append(PREVIEW_COMMITMENT_HTML)
+    parts.append('</article>\n')
+    return ''.join(parts)
+
+@bp.route('/api/preview', methods=['POST'])
+@rate_limited('draft')
+def preview():
+    """Render in-progress answers as an HTML fragment"""
+    data = request.get_json(silent=True)
+    answers = data.get('answers', {}) if isinstance(data, dict) else None
+    error = validate_answers(answers)
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+    response = make_response(render_preview_html(answers))
+    response.headers['Content-Type'] = 'text/html; charset=utf-8'
+    return response
+
+@bp.route('/api/prds/<sid>/preview', methods=['GET'])
+def prd_preview(sid):
+    """Render a stored PRD as a standalone HTML page"""
+    try:
+        submission = load_submission(sid)
+    except KeyError:
+        return jsonify({'success': False, 'error': 'PRD not found'}), 404
+    response = make_response(PREVIEW_PAGE_TEMPLATE.substitute(
+        title=f"PRD {html.escape(sid)}",
+        body=render_preview_html(submission['answers'])
+    ))
+    response.headers['Content-Type'] = 'text/html; charset=utf-8'
+    return response
+
+# ---------------------------------------------------------------------------
+# Application factory and warm-up
+# ---------------------------------------------------------------------------
+
+# Phase name -> milliseconds, filled in by create_app()
+STARTUP_REPORT = {}
+
+def warm_up(report):
+    """Build all shared, read-only state once, timing each phase.
+
+    Run by create_app(); under gunicorn --preload that is the master process,
+    so workers inherit the results copy-on-write. Nothing here may open a
+    database or file handle that a forked worker would share.
+    """
+    def phase(name, fn):
+        started = time.perf_counter()
+        fn()
+        report[name] = round((time.perf_counter() - started) * 1000, 2)
+    
+    def storage():
+        PRD_DIR.mkdir(exist_ok=True)
+        STATE_DIR.mkdir(exist_ok=True)
+    
+    def preview_cache():
+        # Every new participant's first preview is the empty document
+        render_preview_html({})
+    
+    phase('storage', storage)
+    phase('assets', lambda: ASSETS.update(build_assets()))
+    phase('preview_cache', preview_cache)
+
+def create_app():
+    """Application factory: warm up shared state, then assemble the Flask app"""
+    report = {'module': round((time.perf_counter() - _MODULE_STARTED) * 1000, 2)}
+    started = time.perf_counter()
+    warm_up(report)
+    
+    app = Flask(__name__)
+    app.config['MAX_CONTENT_LENGTH'] = MAX_SUBMISSION_BYTES
+    if PROXY_HOPS:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_HOPS, x_proto=PROXY_HOPS, x_host=PROXY_HOPS)
+    CORS(app)
+    app.register_blueprint(bp)
+    
+    report['create_app'] = round((time.perf_counter() - started) * 1000, 2)
+    report['assets_bytes'] = sum(len(a['body']) + len(a['gzip']) for a in ASSETS.values())
+    STARTUP_REPORT.clear()
+    STARTUP_REPORT.update(report)
+    app.logger.info('startup %s', json.dumps(report))
+    return app
+
+@bp.route('/api/startup', methods=['GET'])
+def startup_report():
+    """Report how long the last cold start spent in each phase"""
+    return jsonify({'pid': os.getpid(), **STARTUP_REPORT})
+
+app = create_app()
+
 if __name__ == '__main__':
     print("🚀 Rapid Prototype Genesis Server Starting...")
     print("📱 Access at: http://localhost:5000")
@@ -0,0 +1,55 @@
+"""
+Gunicorn configuration for Rapid Prototype Genesis
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Runs threaded (gthread) workers so one box can hold hundreds of concurrent
+workshop participants instead of two in-flight requests. Storage is safe to
+share between threads and workers: saves use unique ids and atomic renames,
+aggregates are flock-serialized, and SQLite connections are per thread.
+
+Every setting can be overridden from the environment (RPG_*) or on the
+command line.
+"""
+
+import gc
+import json
+import multiprocessing
+import os
+
+bind = os.environ.get('RPG_BIND', '0.0.0.0:5005')
+
+# One process per core; threads absorb requests blocked on disk or on the
+# network. workers * threads is the number of requests served at once.
+worker_class = 'gthread'
+workers = int(os.environ.get('RPG_WORKERS', max(2, multiprocessing.cpu_count())))
+threads = int(os.environ.get('RPG_THREADS', 32))
+worker_connections = int(os.environ.get('RPG_WORKER_CONNECTIONS', 1000))
+
+# Import the app once in the master and fork workers from it so the large
+# template strings and question schema are shared copy-on-write.
+preload_app = True
+
+timeout = int(os.environ.get('RPG_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers periodically to bound any slow leak
+max_requests = 2000
+max_requests_jitter = 200
+
+accesslog = os.environ.get('RPG_ACCESS_LOG')
+errorlog = '-'
+
+
+def when_ready(server):
+    server.log.info(
+        "Serving with %d %s workers x %d threads", workers, worker_class, threads
+    )
+    if server.cfg.preload_app:
+        from app import STARTUP_REPORT
+        server.log.info("Startup (ms): %s", json.dumps(STARTUP_REPORT))
+        # Move everything built during warm-up out of the collector's reach so
+        # garbage collection in the workers never writes to (and un-shares)
+        # those pages
+        gc.freeze()
@@ -0,0 +1,34 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Configure before the app module is imported: it reads these at import time
+os.environ.setdefault('RPG_STATE_DIR', tempfile.mkdtemp(prefix='rpg-test-state-'))
+os.environ.setdefault('RPG_TRACE_SAMPLE_RATE', '0')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import app as rpg  # noqa: E402
+
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    """The app module with every storage path pointed into tmp_path"""
+    prd_dir = tmp_path / 'generated_prds'
+    state_dir = tmp_path / 'rpg_state'
+    prd_dir.mkdir()
+    state_dir.mkdir()
+    monkeypatch.setattr(rpg, 'PRD_DIR', prd_dir)
+    monkeypatch.setattr(rpg, 'SEGMENT_DIR', prd_dir / 'segments')
+    monkeypatch.setattr(rpg, 'SEGMENT_INDEX_PATH', prd_dir / 'segments' / 'index.db')
+    monkeypatch.setattr(rpg, 'COMPACTION_LOCK_PATH', state_dir / 'compaction.lock')
+    monkeypatch.setattr(rpg, 'STATS_DB', state_dir / 'stats.db')
+    monkeypatch.setattr(rpg, '_stats_view_cache', (None, None))
+    monkeypatch.setattr(rpg, 'RATE_LIMIT_DB', state_dir / 'ratelimit.db')
+    monkeypatch.setattr(rpg, 'DRAFT_DB', state_dir / 'drafts.db')
+    monkeypatch.setattr(rpg, 'DRAFT_SNAPSHOT_PATH', state_dir / 'drafts.snapshot.db')
+    monkeypatch.setattr(rpg, 'DRAFT_LOCK_PATH', state_dir / 'drafts.lock')
+    monkeypatch.setattr(rpg, '_draft_ready_pid', None)
+    return rpg
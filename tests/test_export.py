@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+TOKEN = 'test-export-token'
+
+
+@pytest.fixture
+def client(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'EXPORT_TOKEN', TOKEN)
+    return app_module.app.test_client()
+
+
+def export(client, token=TOKEN, **params):
+    headers = {'Authorization': f"Bearer {token}"} if token else {}
+    return client.get('/api/export', query_string=params, headers=headers)
+
+
+def exported_ids(response):
+    return [json.loads(line)['id'] for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_export_is_disabled_without_a_token(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'EXPORT_TOKEN', None)
+    assert export(app_module.app.test_client()).status_code == 403
+
+
+def test_export_requires_the_token(client):
+    assert export(client, token=None).status_code == 401
+    assert export(client, token='wrong').status_code == 401
+    assert export(client).status_code == 200
+
+
+def test_export_merges_loose_and_packed_in_id_order(app_module, client):
+    ids = [app_module.store_prd(f"# {i}", {'0': str(i)}, '2026-01-01T00:00:00.000Z')[0] for i in range(4)]
+    app_module.pack_cold_files(float('inf'))
+    ids += [app_module.store_prd(f"# {i}", {'0': str(i)}, '2026-01-01T00:00:00.000Z')[0] for i in range(4, 6)]
+    assert exported_ids(export(client)) == ids
+
+
+def test_export_resumes_after_the_cursor(app_module, client):
+    ids = [app_module.store_prd('# x', {}, '2026-01-01T00:00:00.000Z')[0] for _ in range(5)]
+    app_module.pack_cold_files(float('inf'))
+    assert exported_ids(export(client, cursor=ids[1])) == ids[2:]
+
+
+def test_export_filters_on_timestamp(app_module, client):
+    early = app_module.store_prd('# a', {}, '2026-01-01T00:00:00.000Z')[0]
+    late = app_module.store_prd('# b', {}, '2026-03-01T00:00:00.000Z')[0]
+    assert exported_ids(export(client, since='2026-02-01T00:00:00Z')) == [late]
+    assert exported_ids(export(client, until='2026-02-01T00:00:00Z')) == [early]
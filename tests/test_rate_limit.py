@@ -0,0 +1,61 @@
+import pytest
+
+
+@pytest.fixture
+def clock(app_module, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(app_module.time, 'time', lambda: now[0])
+    return now
+
+
+def limit(app_module, monkeypatch, budget, per_ip, global_=(0, 0)):
+    monkeypatch.setitem(app_module.WRITE_BUDGETS, budget, (*per_ip, *global_))
+
+
+def test_burst_then_refill(app_module, monkeypatch, clock):
+    limit(app_module, monkeypatch, 'save', (0.5, 3))
+    assert [app_module.acquire_write_token('1.2.3.4') for _ in range(3)] == [None] * 3
+    
+    status, retry_after = app_module.acquire_write_token('1.2.3.4')
+    assert status == 429
+    assert retry_after == pytest.approx(2)
+    
+    clock[0] += 2
+    assert app_module.acquire_write_token('1.2.3.4') is None
+    assert app_module.acquire_write_token('1.2.3.4')[0] == 429
+
+
+def test_clients_have_separate_buckets(app_module, monkeypatch, clock):
+    limit(app_module, monkeypatch, 'save', (1, 1))
+    assert app_module.acquire_write_token('1.1.1.1') is None
+    assert app_module.acquire_write_token('1.1.1.1')[0] == 429
+    assert app_module.acquire_write_token('2.2.2.2') is None
+
+
+def test_global_bucket_sheds_load(app_module, monkeypatch, clock):
+    limit(app_module, monkeypatch, 'save', (1, 10), global_=(1, 2))
+    assert app_module.acquire_write_token('1.1.1.1') is None
+    assert app_module.acquire_write_token('2.2.2.2') is None
+    assert app_module.acquire_write_token('3.3.3.3')[0] == 503
+
+
+def test_rejection_does_not_spend_tokens(app_module, monkeypatch, clock):
+    limit(app_module, monkeypatch, 'save', (1, 1), global_=(1, 5))
+    app_module.acquire_write_token('1.1.1.1')
+    for _ in range(5):
+        assert app_module.acquire_write_token('1.1.1.1')[0] == 429
+    # The refused requests left the global bucket untouched
+    assert [app_module.acquire_write_token(f"10.0.0.{i}") for i in range(4)] == [None] * 4
+
+
+def test_budgets_are_independent(app_module, monkeypatch, clock):
+    limit(app_module, monkeypatch, 'draft', (1, 1))
+    limit(app_module, monkeypatch, 'save', (1, 1))
+    assert app_module.acquire_write_token('1.1.1.1', 'draft') is None
+    assert app_module.acquire_write_token('1.1.1.1', 'draft')[0] == 429
+    assert app_module.acquire_write_token('1.1.1.1', 'save') is None
+
+
+def test_zero_rate_disables_a_bucket(app_module, monkeypatch, clock):
+    limit(app_module, monkeypatch, 'save', (0, 0))
+    assert all(app_module.acquire_write_token('1.1.1.1') is None for _ in range(50))
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+TIMESTAMP = '2026-01-01T00:00:00.000Z'
+
+
+@pytest.fixture
+def revisions(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'REVISION_SNAPSHOT_EVERY', 3)
+    return app_module
+
+
+def save_lineage(app_module, count):
+    """Store a PRD and `count - 1` revisions, returning [(id, answers)]"""
+    answers = {'0': 'v0', '1': 'keep'}
+    sid, _ = app_module.store_prd('# v0', answers, TIMESTAMP)
+    saved = [(sid, answers)]
+    for i in range(1, count):
+        answers = dict(answers, **{'0': f"v{i}"})
+        if i == 4:
+            del answers['1']
+        sid, _ = app_module.store_revision(f"# v{i}", answers, TIMESTAMP, sid)
+        saved.append((sid, answers))
+    return saved
+
+
+def test_revisions_reconstruct_across_snapshots(revisions):
+    saved = save_lineage(revisions, 8)
+    for depth, (sid, answers) in enumerate(saved):
+        submission = revisions.load_submission(sid)
+        assert submission['answers'] == answers
+        assert submission['depth'] == depth
+        assert submission['parent'] == (saved[depth - 1][0] if depth else None)
+
+
+def test_every_nth_revision_is_a_snapshot(revisions):
+    saved = save_lineage(revisions, 8)
+    for depth, (sid, _) in enumerate(saved):
+        record = json.loads((revisions.PRD_DIR / f"answers_{sid}.json").read_text())
+        if depth % 3:
+            assert 'delta' in record and 'answers' not in record
+            assert record['markdown_file'] is None
+        else:
+            assert 'answers' in record and 'delta' not in record
+
+
+def test_reconstruction_reads_packed_ancestors(revisions):
+    saved = save_lineage(revisions, 5)
+    assert revisions.pack_cold_files(cutoff=float('inf')) == 5
+    assert not list(revisions.PRD_DIR.glob('answers_*.json'))
+    for sid, answers in saved:
+        assert revisions.load_submission(sid)['answers'] == answers
+
+
+def test_missing_ancestor_raises_key_error(revisions):
+    saved = save_lineage(revisions, 3)
+    (revisions.PRD_DIR / f"answers_{saved[1][0]}.json").unlink()
+    with pytest.raises(KeyError):
+        revisions.load_submission(saved[2][0])
+
+
+def test_unknown_parent_raises_key_error(revisions):
+    with pytest.raises(KeyError):
+        revisions.store_revision('# x', {}, TIMESTAMP, '01ARZ3NDEKTSV4RRFFQ69G5FAV')
+
+
+def test_bulk_import_reports_delta_revisions(revisions):
+    saved = save_lineage(revisions, 2)
+    path = str(revisions.PRD_DIR / f"answers_{saved[1][0]}.json")
+    assert revisions._render_answers_file(path) == (path, None, 'delta revision without its parent')
+    assert revisions._render_answers_file(path, skip_deltas=True) == (path, None, None)
+
+
+def test_history_lists_legacy_keys_by_name(revisions):
+    sid, _ = revisions.store_prd('# v0', {'0': 'v0', 'notes': 'old', '999': 'gone'}, TIMESTAMP)
+    sid, _ = revisions.store_revision('# v1', {'0': 'v1'}, TIMESTAMP, sid)
+    response = revisions.app.test_client().get(f"/api/prds/{sid}/history")
+    assert response.status_code == 200
+    changes = response.get_json()['history'][1]['changes']
+    assert [(c['question'], c.get('key')) for c in changes] == [(0, None), (None, '999'), (None, 'notes')]
+    assert changes[2]['before'] == 'old' and changes[2]['after'] is None
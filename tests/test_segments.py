@@ -0,0 +1,97 @@
+import json
+
+import pytest
+
+TIMESTAMP = '2026-01-01T00:00:00.000Z'
+EVERYTHING = float('inf')
+
+
+@pytest.fixture
+def archive(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'REVISION_SNAPSHOT_EVERY', 10)
+    return app_module
+
+
+def segment_bytes(app_module):
+    return b''.join(p.read_bytes() for p in app_module.SEGMENT_DIR.glob('seg-*.dat'))
+
+
+def test_packing_keeps_the_stored_markdown(archive):
+    sid, _ = archive.store_prd('# Stored exactly\n', {'0': 'a'}, TIMESTAMP)
+    assert archive.pack_cold_files(EVERYTHING) == 1
+    assert not list(archive.PRD_DIR.glob('*.md'))
+    submission = archive.load_submission(sid)
+    assert archive.submission_markdown(sid, submission) == '# Stored exactly\n'
+
+
+def test_expiry_deletes_records_and_their_bytes(archive):
+    old, _ = archive.store_prd('# old', {'0': 'EXPIRED-ANSWER'}, TIMESTAMP)
+    kept, _ = archive.store_prd('# kept', {'0': 'KEPT-ANSWER'}, TIMESTAMP)
+    archive.pack_cold_files(EVERYTHING)
+    conn = archive._segment_db()
+    conn.execute('UPDATE packed SET created = 0 WHERE id = ?', (old,))
+    
+    assert archive.expire_packed(cutoff=1) == 1
+    with pytest.raises(KeyError):
+        archive.load_submission(old)
+    assert archive.load_submission(kept)['answers'] == {'0': 'KEPT-ANSWER'}
+    assert archive.packed_count() == 1
+    # The surviving segment was rewritten without the expired record
+    data = segment_bytes(archive)
+    assert b'EXPIRED-ANSWER' not in data and b'KEPT-ANSWER' in data
+
+
+def test_expiring_everything_removes_the_segments(archive):
+    for i in range(3):
+        archive.store_prd(f"# {i}", {'0': str(i)}, TIMESTAMP)
+    archive.pack_cold_files(EVERYTHING)
+    assert archive.expire_packed(EVERYTHING) == 3
+    assert archive.packed_count() == 0
+    assert not list(archive.SEGMENT_DIR.glob('seg-*.dat'))
+
+
+def test_expiry_keeps_ancestors_of_live_revisions(archive):
+    root, _ = archive.store_prd('# v0', {'0': 'v0'}, TIMESTAMP)
+    child, _ = archive.store_revision('# v1', {'0': 'v1'}, TIMESTAMP, root)
+    archive.pack_cold_files(EVERYTHING)
+    conn = archive._segment_db()
+    conn.execute('UPDATE packed SET created = 0 WHERE id = ?', (root,))
+    
+    assert archive.expire_packed(cutoff=1) == 0
+    assert archive.load_submission(child)['answers'] == {'0': 'v1'}
+
+
+def test_revision_saved_during_the_expiry_scan_keeps_its_parent(archive, monkeypatch):
+    parent, _ = archive.store_prd('# v0', {'0': 'v0'}, TIMESTAMP)
+    archive.pack_cold_files(EVERYTHING)
+    list_answer_files = archive.list_answer_files
+    saved = []
+    
+    def save_during_first_scan():
+        paths = list_answer_files()
+        if not saved:
+            saved.append(archive.store_revision('# v1', {'0': 'v1'}, TIMESTAMP, parent)[0])
+        return paths
+    
+    monkeypatch.setattr(archive, 'list_answer_files', save_during_first_scan)
+    assert archive.expire_packed(EVERYTHING) == 0
+    assert archive.load_submission(saved[0])['answers'] == {'0': 'v1'}
+
+
+def test_revision_of_a_parent_expired_mid_save_becomes_a_snapshot(archive, monkeypatch):
+    parent, _ = archive.store_prd('# v0', {'0': 'v0', '1': 'same'}, TIMESTAMP)
+    archive.pack_cold_files(EVERYTHING)
+    load_submission = archive.load_submission
+    
+    def load_then_expire(sid):
+        submission = load_submission(sid)
+        archive.expire_packed(EVERYTHING)
+        return submission
+    
+    monkeypatch.setattr(archive, 'load_submission', load_then_expire)
+    child, _ = archive.store_revision('# v1', {'0': 'v1', '1': 'same'}, TIMESTAMP, parent)
+    monkeypatch.setattr(archive, 'load_submission', load_submission)
+    
+    record = json.loads((archive.PRD_DIR / f"answers_{child}.json").read_text())
+    assert 'delta' not in record
+    assert archive.load_submission(child)['answers'] == {'0': 'v1', '1': 'same'}
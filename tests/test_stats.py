@@ -0,0 +1,27 @@
+def test_saves_accumulate_into_the_counters(app_module):
+    app_module.update_stats({'0': 'x' * 100, '1': ''}, '2026-01-01T00:00:00.000Z')
+    app_module.update_stats({'0': 'x' * 100}, '2026-01-02T00:00:00.000Z')
+    view = app_module.stats_view()
+    assert view['submissions'] == 2
+    assert view['submissions_per_day'] == {'2026-01-01': 1, '2026-01-02': 1}
+    assert view['questions'][0]['answered'] == 2
+    assert view['questions'][1]['skipped'] == 2
+    section = app_module.QUESTIONS[0]['section']
+    assert abs(view['sections'][section]['median_answer_length'] - 100) <= 2
+
+
+def test_the_view_is_refreshed_after_a_save(app_module):
+    assert app_module.stats_view()['submissions'] == 0
+    app_module.update_stats({}, '2026-01-01T00:00:00.000Z')
+    assert app_module.stats_view()['submissions'] == 1
+
+
+def test_rebuild_replaces_the_counters_from_the_archive(app_module):
+    for _ in range(3):
+        app_module.store_prd('# x', {'0': 'yes'}, '2026-01-01T00:00:00.000Z')
+    app_module.update_stats({'0': 'stray'}, '2026-02-01T00:00:00.000Z')
+    result = app_module.app.test_cli_runner().invoke(args=['rebuild-stats'])
+    assert result.exit_code == 0, result.output
+    view = app_module.stats_view()
+    assert view['submissions'] == 3
+    assert view['submissions_per_day'] == {'2026-01-01': 3}
@@ -0,0 +1,88 @@
+import pytest
+
+SESSION = 'session-0123456789abcdef'
+
+
+def segment(seq, text, question=0):
+    return {'question': question, 'seq': seq, 'text': text}
+
+
+@pytest.fixture
+def draft(app_module):
+    app_module.save_draft(SESSION, {}, 0, create=True)
+    return app_module
+
+
+def answer(app_module, question=0):
+    return app_module.load_draft(SESSION)['answers'].get(str(question), '')
+
+
+def test_segments_are_appended_in_order(draft):
+    result = draft.append_transcript(SESSION, [segment(0, 'hello '), segment(1, 'world')])
+    assert result == {'accepted': 2, 'duplicates': 0, 'next_seq': {'0': 2}}
+    assert answer(draft) == 'hello world'
+
+
+def test_early_segments_wait_for_the_gap(draft):
+    draft.append_transcript(SESSION, [segment(2, 'c'), segment(1, 'b')])
+    assert answer(draft) == ''
+    
+    result = draft.append_transcript(SESSION, [segment(0, 'a')])
+    assert result['next_seq'] == {'0': 3}
+    assert answer(draft) == 'abc'
+
+
+def test_replays_are_ignored(draft):
+    draft.append_transcript(SESSION, [segment(0, 'a'), segment(2, 'c')])
+    
+    # seq 0 was applied and seq 2 is buffered; neither may be added twice
+    result = draft.append_transcript(SESSION, [segment(0, 'a'), segment(2, 'c'), segment(1, 'b')])
+    assert result['accepted'] == 1
+    assert result['duplicates'] == 2
+    assert answer(draft) == 'abc'
+
+
+def test_questions_are_sequenced_independently(draft):
+    draft.append_transcript(SESSION, [segment(0, 'x', question=3), segment(0, 'y', question=5)])
+    assert answer(draft, 3) == 'x'
+    assert answer(draft, 5) == 'y'
+
+
+def test_gap_beyond_the_buffer_is_rejected(draft):
+    draft.append_transcript(SESSION, [segment(0, 'a')])
+    too_far = 1 + draft.TRANSCRIPT_MAX_PENDING + 1
+    with pytest.raises(draft.TranscriptGap) as gap:
+        draft.append_transcript(SESSION, [segment(too_far, 'z')])
+    assert (gap.value.question, gap.value.next_seq) == (0, 1)
+    assert answer(draft) == 'a'
+
+
+def test_whole_draft_upload_resets_the_sequence(draft):
+    draft.append_transcript(SESSION, [segment(0, 'a '), segment(2, 'c ')])
+    draft.save_draft(SESSION, {'0': 'a b c '}, 0, transcript_seq={'0': 3})
+    
+    # Retries of segments the upload covered are dropped, new ones still apply
+    result = draft.append_transcript(SESSION, [segment(1, 'b '), segment(2, 'c '), segment(3, 'd')])
+    assert result == {'accepted': 1, 'duplicates': 2, 'next_seq': {'0': 4}}
+    assert answer(draft) == 'a b c d'
+
+
+def test_unknown_draft(app_module):
+    assert app_module.append_transcript(SESSION, [segment(0, 'a')]) is None
+
+
+def test_draft_reports_the_next_sequence(draft):
+    draft.append_transcript(SESSION, [segment(0, 'a'), segment(1, 'b'), segment(0, 'x', question=2)])
+    assert draft.load_draft(SESSION)['transcript_seq'] == {'0': 2, '2': 1}
+
+
+@pytest.mark.parametrize('bad', [
+    {'question': True, 'seq': 0, 'text': 'a'},
+    {'question': 0, 'seq': False, 'text': 'a'},
+    {'question': 40, 'seq': 0, 'text': 'a'},
+    {'question': 0, 'seq': -1, 'text': 'a'},
+])
+def test_invalid_segments_are_rejected(draft, bad):
+    client = draft.app.test_client()
+    response = client.post(f"/api/drafts/{SESSION}/transcript", json={'segments': [bad]})
+    assert response.status_code == 400